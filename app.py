@@ -1,3 +1,5 @@
+import importlib
+
 from flask import Flask
 from flask_cors import CORS
 from dotenv import load_dotenv
@@ -8,6 +10,9 @@ from routes.report_routes import report_bp
 from routes.analysis_routes import analysis_bp
 from routes.history_routes import history_bp
 from routes.download_routes import download_bp
+from routes.metrics_routes import metrics_bp
+from services.llm_client import warm_up_clients
+from config.supabase_config import SUPABASE_BACKEND, get_supabase
 
 load_dotenv()
 
@@ -20,10 +25,45 @@ app.register_blueprint(report_bp, url_prefix='/api/report')
 app.register_blueprint(analysis_bp, url_prefix='/api/analysis')
 app.register_blueprint(history_bp, url_prefix='/api/history')
 app.register_blueprint(download_bp, url_prefix='/api/download')
+app.register_blueprint(metrics_bp, url_prefix='/api/metrics')
+
+
+# Imported only for their side effect of landing in sys.modules
+PRELOAD_MODULES = ("numpy", "supabase", "langchain_google_genai", "PIL.Image")
+
+
+def preload_dependencies():
+    """
+    Imports the heavy libraries the routes load lazily. Meant for the
+    gunicorn master with --preload, so forked workers share the loaded
+    modules instead of each paying for them on its first request.
+    """
+    for module in PRELOAD_MODULES:
+        importlib.import_module(module)
+
+    from services.pdf_services import get_pdf_template
+    from services.reference_service import find_test_reference
+
+    get_pdf_template()
+    find_test_reference("hemoglobin")
+
+
+def warm_up_worker():
+    """Creates the per-process clients (Gemini, Supabase) before the first request."""
+    warm_up_clients()
+    try:
+        get_supabase()
+    except Exception as e:
+        print(f"Supabase warm-up skipped: {e}")
+
 
 @app.route('/')
 def home():
-    return {"status": "Carescore AI Backend is Running 🟢", "db": "Supabase"}
+    return {
+        "status": "Carescore AI Backend is Running 🟢",
+        "db": "Supabase" if SUPABASE_BACKEND == "supabase" else SUPABASE_BACKEND
+    }
 
 if __name__ == '__main__':
+    warm_up_worker()
     app.run(debug=True, port=5000)
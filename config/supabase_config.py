@@ -1,14 +1,41 @@
 import os
-from supabase import create_client, Client
+import threading
 from dotenv import load_dotenv
 
 load_dotenv()
 
+# "supabase" (default) or "memory" for the offline stand-in used in
+# load tests and profiling (see database/memory_backend.py)
+SUPABASE_BACKEND = os.environ.get("SUPABASE_BACKEND", "supabase").lower()
+
 url: str = os.environ.get("SUPABASE_URL")
 key: str = os.environ.get("SUPABASE_KEY")
 
-if not url or not key:
-    raise ValueError("Supabase credentials not found in .env file")
+_client = None
+_client_lock = threading.Lock()
+
+
+def _create_client():
+    if SUPABASE_BACKEND == "memory":
+        from database.memory_backend import create_memory_client
+
+        return create_memory_client()
+
+    if not url or not key:
+        raise ValueError("Supabase credentials not found in .env file")
+
+    # The supabase package is slow to import; only load it when first used
+    from supabase import create_client
+
+    return create_client(url, key)
+
+
+def get_supabase():
+    """Returns the shared Supabase client, creating it on first use."""
+    global _client
 
-# Initialize the client
-supabase: Client = create_client(url, key)
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = _create_client()
+    return _client
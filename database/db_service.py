@@ -1,10 +1,56 @@
-from config.supabase_config import supabase
+import base64
+import json
+import re
+
+from config.supabase_config import get_supabase
+from database.report_cache import report_cache
 from datetime import datetime
 
+HISTORY_PAGE_SIZE = 20
+HISTORY_MAX_PAGE_SIZE = 100
+
+# Summary fields only; the JSON bodies are fetched per report
+HISTORY_SUMMARY_COLUMNS = (
+    "id,created_at,status,file_url,care_score:analysis_data->care_score"
+)
+
+
+def encode_history_cursor(row):
+    """Opaque, URL-safe cursor for the (created_at, id) of the last row on a page."""
+    raw = json.dumps([row["created_at"], row["id"]]).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+# Report ids are integers or UUIDs
+_REPORT_ID_PATTERN = re.compile(r"\d+|[0-9a-fA-F]{8}-(?:[0-9a-fA-F]{4}-){3}[0-9a-fA-F]{12}")
+
+
+def decode_history_cursor(cursor):
+    """
+    Inverse of encode_history_cursor(). The values end up in a PostgREST
+    filter string, so anything but an ISO timestamp and a report id is
+    rejected with ValueError.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        created_at, report_id = json.loads(raw)
+        datetime.fromisoformat(created_at.replace("Z", "+00:00"))
+    except (TypeError, ValueError, AttributeError) as e:
+        raise ValueError("Invalid history cursor") from e
+
+    if isinstance(report_id, bool) or not (
+        isinstance(report_id, int)
+        or (isinstance(report_id, str) and _REPORT_ID_PATTERN.fullmatch(report_id))
+    ):
+        raise ValueError("Invalid history cursor")
+
+    return created_at, report_id
+
+
 class DBService:
     @staticmethod
-    def create_report(user_id, file_url, raw_data, metadata=None):
-        data = {
+    def _new_report_row(user_id, file_url, raw_data, metadata=None):
+        return {
             "user_id": user_id,
             "file_url": file_url,
             "raw_data": raw_data,
@@ -13,7 +59,11 @@ class DBService:
             "created_at": datetime.utcnow().isoformat()
         }
 
-        response = supabase.table("reports").insert(data).execute()
+    @staticmethod
+    def create_report(user_id, file_url, raw_data, metadata=None):
+        data = DBService._new_report_row(user_id, file_url, raw_data, metadata)
+
+        response = get_supabase().table("reports").insert(data).execute()
 
         
         if not response.data or len(response.data) == 0:
@@ -21,8 +71,33 @@ class DBService:
                 f"Report insert failed. Supabase response: {response}"
             )
 
+        report_cache.set(response.data[0])
         return response.data[0]
 
+    @staticmethod
+    def create_reports(reports):
+        """
+        Inserts many pending reports in one round-trip.
+        `reports` is a list of dicts with user_id, file_url, raw_data
+        (and optional metadata); rows come back in the same order.
+        """
+        if not reports:
+            return []
+
+        rows = [DBService._new_report_row(**r) for r in reports]
+
+        response = get_supabase().table("reports").insert(rows).execute()
+
+        if not response.data or len(response.data) != len(rows):
+            raise Exception(
+                f"Bulk report insert failed. Supabase response: {response}"
+            )
+
+        for report in response.data:
+            report_cache.set(report)
+
+        return response.data
+
 
     @staticmethod
     def update_report_status(report_id, status, confirmed_data=None, analysis_result=None):
@@ -37,27 +112,107 @@ class DBService:
         if analysis_result:
             update_payload["analysis_data"] = analysis_result
 
-        response = supabase.table("reports")\
+        response = get_supabase().table("reports")\
             .update(update_payload)\
             .eq("id", report_id)\
             .execute()
+
+        # The update returns the full row; refresh the cache with it
+        report_cache.invalidate(report_id)
+        if response.data:
+            report_cache.set(response.data[0])
+
         return response.data
 
     @staticmethod
-    def get_user_history(user_id):
-        """Fetches past reports for the History page[cite: 71]."""
-        response = supabase.table("reports")\
-            .select("*")\
-            .eq("user_id", user_id)\
+    def get_user_history(user_id, page_size=HISTORY_PAGE_SIZE, before=None):
+        """
+        Fetches one page of report summaries for the History page.
+        Pages are keyed on (created_at, id), newest first, so reports
+        sharing a timestamp are not skipped: pass the returned opaque
+        next_cursor as `before` to get the following page.
+        """
+        page_size = max(1, min(int(page_size), HISTORY_MAX_PAGE_SIZE))
+
+        query = get_supabase().table("reports")\
+            .select(HISTORY_SUMMARY_COLUMNS)\
+            .eq("user_id", user_id)
+
+        if before:
+            created_at, last_id = decode_history_cursor(before)
+            query = query.or_(
+                f'created_at.lt."{created_at}",'
+                f'and(created_at.eq."{created_at}",id.lt."{last_id}")'
+            )
+
+        # One extra row tells us whether another page exists
+        response = query\
             .order("created_at", desc=True)\
+            .order("id", desc=True)\
+            .limit(page_size + 1)\
             .execute()
-        return response.data
+
+        rows = response.data or []
+        items = rows[:page_size]
+        next_cursor = encode_history_cursor(items[-1]) if len(rows) > page_size else None
+
+        return {"items": items, "next_cursor": next_cursor}
 
     @staticmethod
     def get_report_by_id(report_id):
-        """Fetches a single report details."""
-        response = supabase.table("reports")\
+        """Fetches a single report details (read-through cached)."""
+        cached = report_cache.get(report_id)
+        if cached is not None:
+            return cached
+
+        response = get_supabase().table("reports")\
             .select("*")\
             .eq("id", report_id)\
             .execute()
-        return response.data[0] if response.data else None
+
+        report = response.data[0] if response.data else None
+        report_cache.set(report)
+        return report
+
+    @staticmethod
+    def get_analyzed_reports_page(after_id=None, page_size=HISTORY_MAX_PAGE_SIZE):
+        """
+        One page of analyzed reports across all users, in id order, for
+        maintenance jobs. Pass the last id of a page as `after_id`.
+        """
+        query = get_supabase().table("reports")\
+            .select("id,user_id,created_at,confirmed_data,analysis_data")\
+            .eq("status", "analyzed")
+
+        if after_id is not None:
+            query = query.gt("id", after_id)
+
+        response = query\
+            .order("id")\
+            .limit(page_size)\
+            .execute()
+        return response.data or []
+
+    @staticmethod
+    def save_biomarker_points(rows):
+        """Upserts normalized per-test rows; re-analysis overwrites them."""
+        if not rows:
+            return []
+
+        response = get_supabase().table("biomarker_series")\
+            .upsert(rows, on_conflict="report_id,test_key")\
+            .execute()
+        return response.data
+
+    @staticmethod
+    def get_biomarker_series(user_id, test_keys=None):
+        """Fetches a user's biomarker points, oldest first, in one query."""
+        query = get_supabase().table("biomarker_series")\
+            .select("test_key,measured_at,value,unit,status,report_id")\
+            .eq("user_id", user_id)
+
+        if test_keys:
+            query = query.in_("test_key", list(test_keys))
+
+        response = query.order("measured_at").execute()
+        return response.data or []
@@ -0,0 +1,362 @@
+import copy
+import itertools
+import os
+import random
+import threading
+import time
+from types import SimpleNamespace
+
+
+MEMORY_BACKEND_LATENCY_MS = float(os.getenv("MEMORY_BACKEND_LATENCY_MS", "0"))
+MEMORY_BACKEND_JITTER_MS = float(os.getenv("MEMORY_BACKEND_JITTER_MS", "0"))
+MEMORY_BACKEND_ERROR_RATE = float(os.getenv("MEMORY_BACKEND_ERROR_RATE", "0"))
+
+
+class MemoryBackendError(Exception):
+    pass
+
+
+class FaultInjector:
+    """Sleeps and randomly fails each call, to mimic a remote service."""
+
+    def __init__(self, latency_ms: float, jitter_ms: float, error_rate: float):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+
+    def __call__(self, operation: str):
+        delay = self.latency_ms + random.uniform(-self.jitter_ms, self.jitter_ms)
+        if delay > 0:
+            time.sleep(delay / 1000)
+
+        if self.error_rate and random.random() < self.error_rate:
+            raise MemoryBackendError(f"Injected failure in {operation}")
+
+
+def _parse_columns(columns: str):
+    """
+    "id,care_score:analysis_data->care_score" ->
+    [("id", ["id"]), ("care_score", ["analysis_data", "care_score"])]
+    """
+    parsed = []
+    for item in columns.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        alias, _, expr = item.rpartition(":")
+        path = expr.replace("->>", "->").split("->")
+        parsed.append((alias or path[-1], path))
+    return parsed
+
+
+def _project(row, columns):
+    if columns is None:
+        return copy.deepcopy(row)
+
+    projected = {}
+    for alias, path in columns:
+        value = row
+        for part in path:
+            value = value.get(part) if isinstance(value, dict) else None
+        projected[alias] = copy.deepcopy(value)
+    return projected
+
+
+_COMPARISONS = {
+    "eq": lambda v, x: v == x,
+    "neq": lambda v, x: v != x,
+    "lt": lambda v, x: v < x,
+    "lte": lambda v, x: v <= x,
+    "gt": lambda v, x: v > x,
+    "gte": lambda v, x: v >= x,
+}
+
+
+def _split_top_level(expr: str):
+    """Splits "a,and(b,c),d" on commas outside parentheses and quotes."""
+    parts, depth, quoted, current = [], 0, False, ""
+    for ch in expr:
+        if ch == '"':
+            quoted = not quoted
+        elif not quoted and ch == "(":
+            depth += 1
+        elif not quoted and ch == ")":
+            depth -= 1
+        elif not quoted and ch == "," and depth == 0:
+            parts.append(current)
+            current = ""
+            continue
+        current += ch
+    parts.append(current)
+    return [p.strip() for p in parts if p.strip()]
+
+
+def _parse_condition(expr: str):
+    """
+    PostgREST logic-tree condition -> row predicate: "col.op.value",
+    with optionally double-quoted values, or nested and(...)/or(...).
+    """
+    for group, combine in (("and(", all), ("or(", any)):
+        if expr.startswith(group) and expr.endswith(")"):
+            conditions = [_parse_condition(c) for c in _split_top_level(expr[len(group):-1])]
+            return lambda row: combine(c(row) for c in conditions)
+
+    column, op, value = expr.split(".", 2)
+    value = value.strip('"')
+    compare = _COMPARISONS[op]
+
+    def predicate(row):
+        v = row.get(column)
+        if v is None:
+            return False
+        # Filter values arrive as text; compare numbers as numbers
+        x = type(v)(value) if isinstance(v, (int, float)) else value
+        return compare(v, x)
+
+    return predicate
+
+
+class _Query:
+    def __init__(self, db, table):
+        self._db = db
+        self._table = table
+        self._action = "select"
+        self._columns = None
+        self._payload = None
+        self._on_conflict = None
+        self._filters = []
+        self._order = []
+        self._limit = None
+
+    def select(self, *columns):
+        self._action = "select"
+        spec = ",".join(columns) if columns else "*"
+        self._columns = None if spec.strip() == "*" else _parse_columns(spec)
+        return self
+
+    def insert(self, data):
+        self._action = "insert"
+        self._payload = data
+        return self
+
+    def upsert(self, data, on_conflict=None):
+        self._action = "upsert"
+        self._payload = data
+        self._on_conflict = on_conflict
+        return self
+
+    def update(self, data):
+        self._action = "update"
+        self._payload = data
+        return self
+
+    def delete(self):
+        self._action = "delete"
+        return self
+
+    def _filter(self, column, predicate):
+        self._filters.append((column, predicate))
+        return self
+
+    def eq(self, column, value):
+        return self._filter(column, lambda v: v is not None and str(v) == str(value))
+
+    def neq(self, column, value):
+        return self._filter(column, lambda v: str(v) != str(value))
+
+    def lt(self, column, value):
+        return self._filter(column, lambda v: v is not None and v < value)
+
+    def lte(self, column, value):
+        return self._filter(column, lambda v: v is not None and v <= value)
+
+    def gt(self, column, value):
+        return self._filter(column, lambda v: v is not None and v > value)
+
+    def gte(self, column, value):
+        return self._filter(column, lambda v: v is not None and v >= value)
+
+    def or_(self, filters: str):
+        condition = _parse_condition(f"or({filters})")
+        return self._filter(None, condition)
+
+    def in_(self, column, values):
+        allowed = {str(v) for v in values}
+        return self._filter(column, lambda v: str(v) in allowed)
+
+    def order(self, column, desc=False):
+        self._order.append((column, desc))
+        return self
+
+    def limit(self, size):
+        self._limit = size
+        return self
+
+    def _matches(self, row):
+        return all(
+            predicate(row if column is None else row.get(column))
+            for column, predicate in self._filters
+        )
+
+    def execute(self):
+        self._db.inject(f"{self._action} {self._table}")
+        with self._db.lock:
+            data = getattr(self, f"_run_{self._action}")(self._db.rows(self._table))
+        return SimpleNamespace(data=data, count=None)
+
+    def _run_select(self, rows):
+        result = [row for row in rows if self._matches(row)]
+
+        # Stable sorts applied last-key-first give multi-column ordering
+        for column, desc in reversed(self._order):
+            result.sort(
+                key=lambda r: (r.get(column) is None, r.get(column)),
+                reverse=desc
+            )
+
+        if self._limit is not None:
+            result = result[:self._limit]
+
+        return [_project(row, self._columns) for row in result]
+
+    def _prepare(self, record):
+        row = copy.deepcopy(record)
+        row.setdefault("id", self._db.next_id(self._table))
+        return row
+
+    def _run_insert(self, rows):
+        records = self._payload if isinstance(self._payload, list) else [self._payload]
+        inserted = [self._prepare(record) for record in records]
+        rows.extend(inserted)
+        return copy.deepcopy(inserted)
+
+    def _run_upsert(self, rows):
+        records = self._payload if isinstance(self._payload, list) else [self._payload]
+        keys = (self._on_conflict or "id").split(",")
+        written = []
+
+        for record in records:
+            match = next(
+                (
+                    row for row in rows
+                    if all(str(row.get(k)) == str(record.get(k)) for k in keys)
+                ),
+                None
+            )
+            if match is not None:
+                match.update(copy.deepcopy(record))
+                written.append(match)
+            else:
+                row = self._prepare(record)
+                rows.append(row)
+                written.append(row)
+
+        return copy.deepcopy(written)
+
+    def _run_update(self, rows):
+        updated = []
+        for row in rows:
+            if self._matches(row):
+                row.update(copy.deepcopy(self._payload))
+                updated.append(row)
+        return copy.deepcopy(updated)
+
+    def _run_delete(self, rows):
+        deleted = [row for row in rows if self._matches(row)]
+        rows[:] = [row for row in rows if not self._matches(row)]
+        return deleted
+
+
+class _Bucket:
+    def __init__(self, storage, name):
+        self._storage = storage
+        self._name = name
+
+    def upload(self, path, file, file_options=None):
+        self._storage.inject(f"upload {self._name}")
+        with self._storage.lock:
+            self._storage.objects[(self._name, path)] = {
+                "data": bytes(file),
+                "content_type": (file_options or {}).get("content-type"),
+            }
+        return SimpleNamespace(path=path, full_path=f"{self._name}/{path}")
+
+    def download(self, path):
+        self._storage.inject(f"download {self._name}")
+        with self._storage.lock:
+            obj = self._storage.objects.get((self._name, path))
+        if obj is None:
+            raise MemoryBackendError(f"Object not found: {self._name}/{path}")
+        return obj["data"]
+
+    def remove(self, paths):
+        self._storage.inject(f"remove {self._name}")
+        removed = []
+        with self._storage.lock:
+            for path in paths:
+                if self._storage.objects.pop((self._name, path), None) is not None:
+                    removed.append({"name": path})
+        return removed
+
+    def list(self, path=None, options=None):
+        self._storage.inject(f"list {self._name}")
+        prefix = f"{path.strip('/')}/" if path else ""
+        with self._storage.lock:
+            names = [
+                key[len(prefix):] for bucket, key in self._storage.objects
+                if bucket == self._name and key.startswith(prefix)
+            ]
+        return [{"name": name} for name in sorted(names) if "/" not in name]
+
+    def get_public_url(self, path):
+        return f"memory://{self._name}/{path}"
+
+
+class MemoryStorage:
+    def __init__(self, inject):
+        self.inject = inject
+        self.lock = threading.Lock()
+        self.objects = {}
+
+    def from_(self, bucket_name):
+        return _Bucket(self, bucket_name)
+
+
+class MemorySupabaseClient:
+    """
+    In-process stand-in for the parts of the Supabase client this app
+    uses: table queries (select/insert/upsert/update/delete with
+    eq/lt/gt/in_/order/limit and JSON-path column aliases) and Storage
+    (upload/download/remove/get_public_url). Every call goes through
+    a FaultInjector for artificial latency and error rates. Auth is not
+    emulated.
+    """
+
+    def __init__(self, latency_ms=0.0, jitter_ms=0.0, error_rate=0.0):
+        self.inject = FaultInjector(latency_ms, jitter_ms, error_rate)
+        self.lock = threading.RLock()
+        self._tables = {}
+        self._ids = {}
+        self.storage = MemoryStorage(self.inject)
+
+    def rows(self, table):
+        return self._tables.setdefault(table, [])
+
+    def next_id(self, table):
+        counter = self._ids.setdefault(table, itertools.count(1))
+        return next(counter)
+
+    def table(self, name):
+        return _Query(self, name)
+
+    @property
+    def auth(self):
+        raise MemoryBackendError("Auth is not available with SUPABASE_BACKEND=memory")
+
+
+def create_memory_client():
+    return MemorySupabaseClient(
+        latency_ms=MEMORY_BACKEND_LATENCY_MS,
+        jitter_ms=MEMORY_BACKEND_JITTER_MS,
+        error_rate=MEMORY_BACKEND_ERROR_RATE,
+    )
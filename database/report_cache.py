@@ -0,0 +1,130 @@
+import copy
+import os
+import threading
+from abc import ABC, abstractmethod
+
+from utils.cache import LocalCache
+
+
+# "none" (default) or "local". The local backend is per process and only
+# invalidated in the worker that wrote the report, so other gunicorn
+# workers would serve stale rows until the TTL; only enable it for a
+# single-process deployment, or plug in a shared CacheBackend.
+REPORT_CACHE_BACKEND = os.getenv("REPORT_CACHE_BACKEND", "none").lower()
+REPORT_CACHE_SIZE = int(os.getenv("REPORT_CACHE_SIZE", "512"))
+REPORT_CACHE_TTL = float(os.getenv("REPORT_CACHE_TTL", "300"))
+
+
+class CacheBackend(ABC):
+    """
+    Storage interface behind ReportCache. Implement these three methods
+    over a shared store (Redis, memcached, ...) to share entries between
+    gunicorn workers; values are plain JSON-compatible dicts.
+    """
+
+    @abstractmethod
+    def get(self, key):
+        ...
+
+    @abstractmethod
+    def set(self, key, value):
+        ...
+
+    @abstractmethod
+    def delete(self, key):
+        ...
+
+
+class LocalCacheBackend(CacheBackend):
+    """Per-process TTL/LRU backend."""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self._cache = LocalCache(maxsize, ttl)
+
+    def get(self, key):
+        return self._cache.get(key)
+
+    def set(self, key, value):
+        self._cache.set(key, value)
+
+    def delete(self, key):
+        self._cache.delete(key)
+
+
+class NullCacheBackend(CacheBackend):
+    """Disables caching while keeping the metrics."""
+
+    def get(self, key):
+        return None
+
+    def set(self, key, value):
+        pass
+
+    def delete(self, key):
+        pass
+
+
+class ReportCache:
+    def __init__(self, backend: CacheBackend):
+        self.backend = backend
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def _key(report_id):
+        return f"report:{report_id}"
+
+    def get(self, report_id):
+        try:
+            report = self.backend.get(self._key(report_id))
+        except Exception as e:
+            print(f"Report cache read failed: {e}")
+            report = None
+
+        with self._lock:
+            if report is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+
+        return copy.deepcopy(report) if report is not None else None
+
+    def set(self, report):
+        if not report or "id" not in report:
+            return
+        try:
+            self.backend.set(self._key(report["id"]), copy.deepcopy(report))
+        except Exception as e:
+            print(f"Report cache write failed: {e}")
+
+    def invalidate(self, report_id):
+        try:
+            self.backend.delete(self._key(report_id))
+        except Exception as e:
+            print(f"Report cache delete failed: {e}")
+
+        with self._lock:
+            self.invalidations += 1
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "backend": type(self.backend).__name__,
+                "hits": self.hits,
+                "misses": self.misses,
+                "invalidations": self.invalidations,
+                "hit_ratio": round(self.hits / lookups, 3) if lookups else 0.0,
+                "saved_round_trips": self.hits,
+            }
+
+
+def _make_backend():
+    if REPORT_CACHE_BACKEND == "local":
+        return LocalCacheBackend(REPORT_CACHE_SIZE, REPORT_CACHE_TTL)
+    return NullCacheBackend()
+
+
+report_cache = ReportCache(_make_backend())
@@ -0,0 +1,18 @@
+-- One row per (report, biomarker), written when a report is analyzed.
+-- Trend queries read a user's series straight from here instead of
+-- walking confirmed_data JSON across every report.
+
+create table if not exists biomarker_series (
+    id bigint generated always as identity primary key,
+    user_id text not null,
+    report_id text not null,
+    test_key text not null,
+    measured_at timestamptz not null,
+    value double precision not null,
+    unit text,
+    status text,
+    unique (report_id, test_key)
+);
+
+create index if not exists biomarker_series_user_test_time
+    on biomarker_series (user_id, test_key, measured_at);
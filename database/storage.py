@@ -1,9 +1,9 @@
-from config.supabase_config import supabase
+from config.supabase_config import get_supabase
 
 def upload_file(bucket_name, file_path, file_bytes, content_type="application/pdf"):
     """Uploads a file to Supabase Storage[cite: 230]."""
     try:
-        response = supabase.storage.from_(bucket_name).upload(
+        response = get_supabase().storage.from_(bucket_name).upload(
             path=file_path,
             file=file_bytes,
             file_options={"content-type": content_type}
@@ -15,4 +15,29 @@ def upload_file(bucket_name, file_path, file_bytes, content_type="application/pd
 
 def get_public_url(bucket_name, file_path):
     """Generates a public URL for the frontend[cite: 247]."""
-    return supabase.storage.from_(bucket_name).get_public_url(file_path)
\ No newline at end of file
+    return get_supabase().storage.from_(bucket_name).get_public_url(file_path)
+
+def delete_file(bucket_name, file_path):
+    """Removes a stored file, e.g. when its report could not be created."""
+    try:
+        return get_supabase().storage.from_(bucket_name).remove([file_path])
+    except Exception as e:
+        print(f"Delete failed: {e}")
+        return None
+
+def download_file(bucket_name, file_path):
+    """Returns the stored file's bytes, or None if it cannot be read."""
+    try:
+        return get_supabase().storage.from_(bucket_name).download(file_path)
+    except Exception as e:
+        print(f"Download failed: {e}")
+        return None
+
+def list_files(bucket_name, folder):
+    """Names of the files directly inside `folder`, or [] if it cannot be listed."""
+    try:
+        entries = get_supabase().storage.from_(bucket_name).list(folder)
+        return [entry["name"] for entry in entries or []]
+    except Exception as e:
+        print(f"List failed: {e}")
+        return []
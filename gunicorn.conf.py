@@ -0,0 +1,32 @@
+import os
+
+# Set GUNICORN_PRELOAD=true (or pass --preload) to import the app and its
+# heavy dependencies once in the master; forked workers then share them.
+preload_app = os.getenv("GUNICORN_PRELOAD", "false").lower() in ("1", "true", "yes")
+
+
+def when_ready(server):
+    # Runs in the master before any worker is forked
+    if server.cfg.preload_app:
+        from app import preload_dependencies
+
+        preload_dependencies()
+
+
+def post_fork(server, worker):
+    # Clients hold connection pools and threads, so they are created per worker
+    from app import warm_up_worker
+
+    warm_up_worker()
+
+
+def on_starting(server):
+    # Upload jobs (services/job_queue.py) keep their state in the worker
+    # that accepted them, so a status poll routed to another worker would
+    # 404. Refuse to start rather than fail intermittently; scale with
+    # --threads until job state moves to a shared store.
+    if server.cfg.workers > 1:
+        raise RuntimeError(
+            f"gunicorn is configured with {server.cfg.workers} workers, but upload "
+            "job state is per process; run a single worker (use --threads to scale)"
+        )
@@ -1,27 +1,25 @@
-from flask import Blueprint, request, jsonify
+import json
+import math
+from flask import Blueprint, request, jsonify, Response, stream_with_context
 from services.analytics_engine import calculate_care_score
-from services.gemini_text import generate_health_explanation
+from services.gemini_text import generate_health_explanation, stream_health_explanation
 from database.db_service import DBService
 from services.reference_resolver import resolve_test_reference
 from utils.helpers import format_reference_range
-from langchain_google_genai.chat_models import ChatGoogleGenerativeAIError
 from services.reference_service import normalize_gender
+from services.biomarker_series import record_biomarkers_async
+from services.pdf_render_queue import prerender_pdf_async
+from services.llm_client import LLMInvocationError
+from services.quota_governor import user_scope
 
 analysis_bp = Blueprint('analysis_bp', __name__)
 
-@analysis_bp.route('/analyze', methods=['POST'])
-def analyze_report():
-    data = request.json
-    report_id = data.get('report_id')
-    confirmed_data = data.get('confirmed_data')
-
-    if not report_id or not confirmed_data:
-        return jsonify({"error": "Missing report_id or data"}), 400
 
-    
+def _score_confirmed_data(confirmed_data):
+    """Resolves reference ranges in place and calculates the CareScore."""
     gender = normalize_gender(
-    confirmed_data.get("patient", {}).get("gender")
-)
+        confirmed_data.get("patient", {}).get("gender")
+    )
 
     for test in confirmed_data.get("tests", []):
         resolved = resolve_test_reference(test, gender)
@@ -31,48 +29,85 @@ def analyze_report():
             if resolved else "Reference not available"
         )
 
+    return calculate_care_score(confirmed_data.get("tests", []))
 
-    
-    analytics_response = calculate_care_score(
-                            confirmed_data.get("tests", [])
-                        )
 
+def _report_user(report_id):
+    """Owner of the report, so its Gemini calls count against their share."""
+    try:
+        report = DBService.get_report_by_id(report_id)
+    except Exception as e:
+        print("REPORT OWNER LOOKUP ERROR:", e)
+        return None
+    return report.get("user_id") if report else None
 
-    if not analytics_response.get("success"):
-        return jsonify({
-            "success": False,
-            "error": analytics_response.get("error"),
-            "message": analytics_response.get("message"),
-        }), 503
-
-    analytics = analytics_response["data"]
 
-    
+def _score_or_error(confirmed_data):
+    """(analytics, None) on success, (None, error response) otherwise."""
     try:
+        analytics_response = _score_confirmed_data(confirmed_data)
+    except LLMInvocationError as e:
+        analytics_response = e.to_response()
+
+    if analytics_response.get("success"):
+        return analytics_response["data"], None
+
+    body = jsonify({
+        "success": False,
+        "error": analytics_response.get("error"),
+        "message": analytics_response.get("message"),
+    })
+    status = 429 if analytics_response.get("error") == "QUOTA_EXHAUSTED" else 503
+
+    retry_after = analytics_response.get("retry_after")
+    if retry_after is None and status == 429:
+        retry_after = 60
+    if retry_after is None:
+        return None, (body, status)
+
+    return None, (body, status, {"Retry-After": str(max(1, math.ceil(retry_after)))})
+
+
+FALLBACK_EXPLANATION = (
+    "AI explanation temporarily unavailable. "
+    "Your report data is saved. Please retry later."
+)
+
+
+def _ai_status(error_code):
+    return "quota_exhausted" if error_code == "QUOTA_EXHAUSTED" else "unavailable"
+
+
+@analysis_bp.route('/analyze', methods=['POST'])
+def analyze_report():
+    data = request.json
+    report_id = data.get('report_id')
+    confirmed_data = data.get('confirmed_data')
+
+    if not report_id or not confirmed_data:
+        return jsonify({"error": "Missing report_id or data"}), 400
+
+    with user_scope(_report_user(report_id)):
+        analytics, error_response = _score_or_error(confirmed_data)
+
+        if error_response:
+            return error_response
+
+
         explanation_resp = generate_health_explanation(
             confirmed_data,
             analytics['deviations']
         )
 
-        explanation = (
-            explanation_resp.get("content")
-            if isinstance(explanation_resp, dict)
-            else explanation_resp
-        )
-
-        ai_status = "ok"
-
-    except ChatGoogleGenerativeAIError as e:
-        if "RESOURCE_EXHAUSTED" in str(e):
-            explanation = (
-                "AI explanation temporarily unavailable. "
-                "Your report data is saved. Please retry later."
-            )
-            ai_status = "quota_exhausted"
+        if explanation_resp.get("success"):
+            explanation = explanation_resp["content"]
+            ai_status = "ok"
         else:
-            raise
+            print("EXPLANATION ERROR:", explanation_resp.get("error"), explanation_resp.get("message"))
+            explanation = FALLBACK_EXPLANATION
+            ai_status = _ai_status(explanation_resp.get("error"))
+
 
-    
     analysis_result = {
         "care_score": analytics['score'],
         "deviations": analytics['deviations'],
@@ -80,14 +115,105 @@ def analyze_report():
         "ai_status": ai_status,
     }
 
-    DBService.update_report_status(
+    updated = DBService.update_report_status(
         report_id,
         "analyzed",
         confirmed_data,
         analysis_result
     )
 
+    record_biomarkers_async(report_id, confirmed_data, analytics['deviations'])
+    if updated:
+        prerender_pdf_async(updated[0])
+
     return jsonify({
         "success": True,
         "data": analysis_result
     })
+
+
+def _sse(event, payload):
+    return f"event: {event}\ndata: {json.dumps(payload)}\n\n"
+
+
+@analysis_bp.route('/analyze/stream', methods=['POST'])
+def analyze_report_stream():
+    """
+    Same input as /analyze, answered as Server-Sent Events:
+    "score" first, then "token" events with explanation text as Gemini
+    produces it, then "done" with the saved result (or "error").
+    """
+    data = request.json
+    report_id = data.get('report_id')
+    confirmed_data = data.get('confirmed_data')
+
+    if not report_id or not confirmed_data:
+        return jsonify({"error": "Missing report_id or data"}), 400
+
+    user_id = _report_user(report_id)
+
+    with user_scope(user_id):
+        analytics, error_response = _score_or_error(confirmed_data)
+
+    if error_response:
+        return error_response
+
+    def generate():
+        yield _sse("score", {
+            "care_score": analytics['score'],
+            "deviations": analytics['deviations'],
+        })
+
+        parts = []
+        ai_status = "ok"
+
+        try:
+            with user_scope(user_id):
+                for text in stream_health_explanation(confirmed_data, analytics['deviations']):
+                    parts.append(text)
+                    yield _sse("token", {"text": text})
+
+            explanation = "".join(parts)
+
+        except LLMInvocationError as e:
+            print("EXPLANATION STREAM ERROR:", e.code, e.message)
+            explanation = FALLBACK_EXPLANATION
+            ai_status = _ai_status(e.code)
+
+        except Exception as e:
+            yield _sse("error", {"error": "INTERNAL_ERROR", "message": str(e)})
+            return
+
+        analysis_result = {
+            "care_score": analytics['score'],
+            "deviations": analytics['deviations'],
+            "explanation": explanation,
+            "ai_status": ai_status,
+        }
+
+        try:
+            updated = DBService.update_report_status(
+                report_id,
+                "analyzed",
+                confirmed_data,
+                analysis_result
+            )
+        except Exception as e:
+            print("ANALYZE STREAM SAVE ERROR:", e)
+            yield _sse("error", {"error": "SAVE_FAILED", "message": str(e)})
+            return
+
+        record_biomarkers_async(report_id, confirmed_data, analytics['deviations'])
+        if updated:
+            prerender_pdf_async(updated[0])
+
+        yield _sse("done", {"success": True, "data": analysis_result})
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no",
+        }
+    )
@@ -1,5 +1,6 @@
 from flask import Blueprint, request, jsonify
-from config.supabase_config import supabase
+from config.supabase_config import get_supabase
+from services.token_verifier import verify_access_token, InvalidToken
 
 auth_bp = Blueprint('auth_routes', __name__)
 
@@ -7,7 +8,7 @@ auth_bp = Blueprint('auth_routes', __name__)
 def register():
     data = request.json
     try:
-        response = supabase.auth.sign_up({"email": data['email'], "password": data['password']})
+        response = get_supabase().auth.sign_up({"email": data['email'], "password": data['password']})
         return jsonify({"message": "User registered", "user_id": response.user.id}), 201
     except Exception as e:
         return jsonify({"error": str(e)}), 400
@@ -15,7 +16,7 @@ def register():
 @auth_bp.route('/login-password', methods=['POST'])
 def login_password():
     data = request.json
-    response = supabase.auth.sign_in_with_password({
+    response = get_supabase().auth.sign_in_with_password({
         "email": data['email'],
         "password": data['password']
     })
@@ -32,7 +33,7 @@ def login_password():
 def login_otp_init():
     data = request.json
     try:
-        supabase.auth.sign_in_with_otp({"email": data['email']})
+        get_supabase().auth.sign_in_with_otp({"email": data['email']})
         return jsonify({"message": "OTP sent"}), 200
     except Exception as e:
         return jsonify({"error": str(e)}), 400
@@ -41,7 +42,7 @@ def login_otp_init():
 def login_otp_verify():
     data = request.json
     try:
-        response = supabase.auth.verify_otp({"email": data['email'], "token": data['otp'], "type": "email"})
+        response = get_supabase().auth.verify_otp({"email": data['email'], "token": data['otp'], "type": "email"})
         return jsonify({"token": response.session.access_token, "user_id": response.user.id}), 200
     except Exception as e:
         return jsonify({"error": str(e)}), 401
@@ -55,12 +56,12 @@ def get_me():
 
     try:
         token = auth_header.replace("Bearer ", "")
-        res = supabase.auth.get_user(token)
+        claims = verify_access_token(token)
 
         return jsonify({
-            "user_id": res.user.id,
-            "email": res.user.email
+            "user_id": claims["sub"],
+            "email": claims.get("email")
         }), 200
 
-    except Exception as e:
+    except InvalidToken as e:
         return jsonify({"error": "Invalid or expired token"}), 401
@@ -1,6 +1,19 @@
-from flask import Blueprint, send_file
+import io
+from concurrent.futures import TimeoutError as RenderTimeout
+from flask import Blueprint, Response, request, send_file
 from database.db_service import DBService
-from services.pdf_services import generate_report_pdf
+from services.pdf_cache import pdf_cache
+from services.pdf_render_queue import pdf_render_queue
+from services.token_verifier import verify_access_token, InvalidToken
+from services.report_export import (
+    EXPORT_FORMATS,
+    EXPORT_MAX_MERGED_REPORTS,
+    EXPORT_MAX_REPORTS,
+    collect_reports,
+    stream_merged_pdf,
+    stream_zip,
+)
+from utils.constants import PDF_TEMPLATE_VERSION
 from utils.helpers import api_response
 
 download_bp = Blueprint('download_bp', __name__)
@@ -13,14 +26,100 @@ def download_pdf(report_id):
     if not report or report.get('status') != 'analyzed':
         return api_response(False, "Report not ready or found", status_code=404)
 
-    analysis_result = report.get("analysis_data", {})
+    # 2. Revalidation: same analysis and template -> same PDF
+    cache_key = pdf_cache.make_key(report, PDF_TEMPLATE_VERSION)
+    etag = pdf_cache.etag(cache_key)
 
-    # 3. Generate PDF
-    pdf_buffer = generate_report_pdf(report, analysis_result)
+    if request.if_none_match.contains(etag):
+        pdf_cache.record_not_modified()
+        response = Response(status=304)
+        response.set_etag(etag)
+        response.headers["Cache-Control"] = "private, no-cache"
+        return response
 
-    return send_file(
-        pdf_buffer,
+    # 3. Serve the pre-rendered PDF, or wait on its render
+    try:
+        pdf_bytes = pdf_render_queue.get_pdf(report)
+    except RenderTimeout:
+        response, status = api_response(False, "PDF is still being generated", status_code=503)
+        response.headers["Retry-After"] = "5"
+        return response, status
+
+    response = send_file(
+        io.BytesIO(pdf_bytes),
         as_attachment=True,
         download_name=f"report_{report_id}.pdf",
-        mimetype='application/pdf'
+        mimetype='application/pdf',
+        etag=etag
     )
+    response.headers["Cache-Control"] = "private, no-cache"
+    return response
+
+
+@download_bp.route('/export', methods=['GET', 'POST'])
+def export_reports():
+    """
+    The caller's analyzed reports, all of them or a chosen list, in one
+    download: ?report_ids=a,b&format=zip|pdf (or the same keys as a JSON
+    body, with report_ids as a list). Requires a bearer token; only the
+    token's user's reports are exported. Sent with chunked transfer.
+    """
+    auth_header = request.headers.get("Authorization")
+    if not auth_header:
+        return api_response(False, "Missing Authorization header", status_code=401)
+
+    try:
+        claims = verify_access_token(auth_header.replace("Bearer ", ""))
+    except InvalidToken:
+        return api_response(False, "Invalid or expired token", status_code=401)
+
+    user_id = claims["sub"]
+    params = request.get_json(silent=True)
+    if not isinstance(params, dict):
+        params = request.args
+
+    requested_user = params.get('user_id')
+    if requested_user is not None and requested_user != user_id:
+        return api_response(False, "Cannot export another user's reports", status_code=403)
+
+    report_ids = params.get('report_ids')
+    export_format = params.get('format') or 'zip'
+
+    if isinstance(report_ids, str):
+        report_ids = [r.strip() for r in report_ids.split(',') if r.strip()]
+
+    if report_ids is not None and not (
+        isinstance(report_ids, list)
+        and all(isinstance(r, (str, int)) and not isinstance(r, bool) for r in report_ids)
+    ):
+        return api_response(False, "report_ids must be a list of ids", status_code=400)
+
+    if not isinstance(export_format, str) or export_format.lower() not in EXPORT_FORMATS:
+        return api_response(False, f"format must be one of: {', '.join(EXPORT_FORMATS)}", status_code=400)
+    export_format = export_format.lower()
+
+    if report_ids and len(report_ids) > EXPORT_MAX_REPORTS:
+        return api_response(False, f"At most {EXPORT_MAX_REPORTS} reports per export", status_code=400)
+
+    reports = collect_reports(user_id, report_ids or None)
+    if not reports:
+        return api_response(False, "No analyzed reports to export", status_code=404)
+
+    if export_format == 'pdf' and len(reports) > EXPORT_MAX_MERGED_REPORTS:
+        return api_response(
+            False,
+            f"A merged PDF holds at most {EXPORT_MAX_MERGED_REPORTS} reports; "
+            "pick fewer report_ids or use format=zip",
+            status_code=400
+        )
+
+    if export_format == 'pdf':
+        body, mimetype = stream_merged_pdf(reports), 'application/pdf'
+    else:
+        body, mimetype = stream_zip(reports), 'application/zip'
+
+    # No Content-Length: the bundle is produced while it is being sent
+    response = Response(body, mimetype=mimetype)
+    response.headers["Content-Disposition"] = f'attachment; filename="reports.{export_format}"'
+    response.headers["Cache-Control"] = "private, no-store"
+    return response
@@ -1,5 +1,6 @@
 from flask import Blueprint, request, jsonify
-from database.db_service import DBService
+from database.db_service import DBService, HISTORY_PAGE_SIZE
+from services.biomarker_series import get_biomarker_trends
 
 history_bp = Blueprint('history_bp', __name__)
 
@@ -9,8 +10,43 @@ def list_history():
     if not user_id:
         return jsonify({"error": "User ID required"}), 400
 
-    history = DBService.get_user_history(user_id)
-    return jsonify({"success": True, "data": history})
+    try:
+        page_size = int(request.args.get('page_size', HISTORY_PAGE_SIZE))
+    except ValueError:
+        return jsonify({"error": "page_size must be an integer"}), 400
+
+    try:
+        history = DBService.get_user_history(
+            user_id,
+            page_size=page_size,
+            before=request.args.get('cursor')
+        )
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    return jsonify({
+        "success": True,
+        "data": history["items"],
+        "next_cursor": history["next_cursor"]
+    })
+
+@history_bp.route('/trends', methods=['GET'])
+def get_trends():
+    """
+    Biomarker series for a user, e.g. ?user_id=...&tests=hdl,ldl&max_points=100
+    (all biomarkers when tests is omitted, no downsampling without max_points).
+    """
+    user_id = request.args.get('user_id')
+    if not user_id:
+        return jsonify({"error": "User ID required"}), 400
+
+    tests = [t.strip() for t in request.args.get('tests', '').split(',') if t.strip()]
+    max_points = request.args.get('max_points', type=int)
+
+    return jsonify({
+        "success": True,
+        "data": get_biomarker_trends(user_id, tests or None, max_points)
+    })
 
 @history_bp.route('/<report_id>', methods=['GET'])
 def get_report(report_id):
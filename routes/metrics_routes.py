@@ -0,0 +1,34 @@
+from flask import Blueprint, jsonify
+from database.report_cache import report_cache
+from services.llm_client import get_client_stats, get_breaker_stats
+from services.extraction_cache import extraction_cache
+from services.gemini_text import explanation_cache
+from services.job_queue import upload_queue
+from services.image_preprocessor import get_preprocessing_stats
+from services.token_verifier import get_verifier_stats
+from services.quota_governor import governor
+from services.pdf_cache import pdf_cache
+from services.pdf_render_queue import pdf_render_queue
+from services.report_export import export_stats
+
+metrics_bp = Blueprint('metrics_bp', __name__)
+
+@metrics_bp.route('/', methods=['GET'])
+def get_metrics():
+    return jsonify({
+        "success": True,
+        "data": {
+            "llm_clients": get_client_stats(),
+            "llm_breaker": get_breaker_stats(),
+            "extraction_cache": extraction_cache.stats(),
+            "explanation_cache": explanation_cache.stats(),
+            "upload_queue": upload_queue.stats(),
+            "image_preprocessing": get_preprocessing_stats(),
+            "report_cache": report_cache.stats(),
+            "token_verifier": get_verifier_stats(),
+            "gemini_quota": governor.stats(),
+            "pdf_cache": pdf_cache.stats(),
+            "pdf_render": pdf_render_queue.stats(),
+            "report_export": export_stats.stats(),
+        }
+    })
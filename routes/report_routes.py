@@ -1,8 +1,8 @@
-from flask import Blueprint, request, jsonify
-from services.gemini_vision import extract_data_from_image
-from database.storage import upload_file, get_public_url
-from database.db_service import DBService
-import uuid
+import json
+from flask import Blueprint, request, jsonify, Response, stream_with_context
+from services.job_queue import upload_queue, JobQueueFull
+from services.upload_pipeline import process_upload
+from services.bulk_upload import collect_upload_files, run_bulk_upload, BulkUploadError
 
 report_bp = Blueprint("report_bp", __name__)
 
@@ -23,63 +23,93 @@ def upload_report():
     if not user_id:
         return jsonify({"success": False, "error": "User ID required"}), 400
 
+    file_bytes = file.read()
+
     try:
-        
-        file_ext = file.filename.rsplit(".", 1)[-1]
-        file_path = f"{user_id}/{uuid.uuid4()}.{file_ext}"
-        bucket_name = "reports"
+        job_id = upload_queue.submit(
+            process_upload,
+            user_id,
+            file_bytes,
+            file.filename,
+            file.content_type,
+            owner=user_id
+        )
+    except JobQueueFull as e:
+        return jsonify({
+            "success": False,
+            "error": "QUEUE_FULL",
+            "message": str(e)
+        }), 503, {"Retry-After": "5"}
+
+    return jsonify({
+        "success": True,
+        "job_id": job_id,
+        "status": "queued"
+    }), 202
+
+
+@report_bp.route("/upload/bulk", methods=["POST"])
+def upload_reports_bulk():
+    """
+    Accepts many report images under "files" (and/or ZIP archives of them).
+    Responds with NDJSON: one line per file as it finishes, then a summary
+    line with the report ids created by a single batched insert.
+    """
+    user_id = request.form.get("user_id")
+    if not user_id:
+        return jsonify({"success": False, "error": "User ID required"}), 400
 
-        file_bytes = file.read()
+    uploads = request.files.getlist("files") or request.files.getlist("file")
+    if not uploads:
+        return jsonify({"success": False, "error": "No files uploaded"}), 400
 
-        upload_file(bucket_name, file_path, file_bytes, file.content_type)
-        file_url = get_public_url(bucket_name, file_path)
+    try:
+        files = collect_upload_files(uploads)
+    except BulkUploadError as e:
+        return jsonify({"success": False, "error": "INVALID_UPLOAD", "message": str(e)}), 400
 
-        
-        print("AI STEP: starting extraction")
-        extraction_result = extract_data_from_image(
-            file_bytes,
-            file.content_type
-        )
-        print("AI STEP: extraction returned")
-        print("AI RESULT:", extraction_result)
-
-        if not extraction_result.get("success"):
-            error_code = extraction_result.get("error") or "AI_FAILED"
-
-            if error_code == "QUOTA_EXHAUSTED":
-                return jsonify({
-                    "success": False,
-                    "error": "QUOTA_EXHAUSTED",
-                    "message": "AI quota exhausted. Please try later."
-                }), 429
-
-            return jsonify({
-                "success": False,
-                "error": "AI_FAILED",
-                "message": extraction_result.get("message") or "AI processing failed."
-            }), 503
-
-        
-        extracted_data = extraction_result["data"]
-
-        report = DBService.create_report(
-            user_id=user_id,
-            file_url=file_url,
-            raw_data=extracted_data,
-        )
+    if not files:
+        return jsonify({"success": False, "error": "No report images found"}), 400
 
-        if not report or "id" not in report:
-            raise Exception("Report insert failed")
+    def generate():
+        for result in run_bulk_upload(user_id, files):
+            yield json.dumps(result) + "\n"
 
-        return jsonify({
-            "success": True,
-            "report_id": report["id"]
-        }), 200
+    return Response(
+        stream_with_context(generate()),
+        mimetype="application/x-ndjson",
+        headers={"X-Accel-Buffering": "no"}
+    )
 
-    except Exception as e:
-        print("UPLOAD ROUTE ERROR:", e)
-        return jsonify({
-            "success": False,
-            "error": "UPLOAD_FAILED",
-            "message": str(e)
-        }), 500
+
+@report_bp.route("/status/<job_id>", methods=["GET"])
+def upload_status(job_id):
+    user_id = request.args.get("user_id")
+
+    if not user_id:
+        return jsonify({"success": False, "error": "User ID required"}), 400
+
+    # Someone else's job is reported as missing rather than forbidden
+    job = upload_queue.get(job_id, owner=user_id)
+
+    if not job:
+        return jsonify({"success": False, "error": "Job not found"}), 404
+
+    response = {
+        "success": True,
+        "job_id": job_id,
+        "status": job["status"],
+        "created_at": job["created_at"],
+        "finished_at": job["finished_at"],
+    }
+
+    if job["status"] == "done":
+        response["report_id"] = job["result"]["report_id"]
+
+    if job["status"] == "failed":
+        response["error"] = job["error"]["error"]
+        response["message"] = job["error"]["message"]
+        if job["error"].get("retry_after") is not None:
+            response["retry_after"] = job["error"]["retry_after"]
+
+    return jsonify(response), 200
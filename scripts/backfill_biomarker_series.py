@@ -0,0 +1,37 @@
+"""
+Backfills the biomarker_series table from existing analyzed reports.
+
+The series is written when a report is analyzed, so reports analyzed
+before it existed have no rows and their users get empty trends. This
+pages through every analyzed report and upserts its rows with the same
+builder the analyze routes use. Safe to re-run.
+
+Usage:
+    python scripts/backfill_biomarker_series.py [--page-size 100] [--dry-run]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from services.biomarker_series import backfill_biomarker_series
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    reports, rows = backfill_biomarker_series(args.page_size, args.dry_run)
+
+    action = "would write" if args.dry_run else "wrote"
+    print(f"{reports} analyzed reports, {action} {rows} series rows in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Compares the PDF chart backends on render time and output size.
+
+Renders the same synthetic report with each backend (reportlab vector
+chart vs. matplotlib PNG) and prints the mean/best render time of the
+chart alone and of the full PDF, plus the size of the resulting PDF.
+The vector chart is only drawn while the PDF is built, so compare the
+full-PDF column for the end-to-end difference.
+
+Usage:
+    python scripts/benchmark_pdf_charts.py [--tests 12] [--runs 20]
+
+The matplotlib backend is skipped if matplotlib is not installed.
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from services.pdf_services import CHART_BACKENDS, generate_biomarker_chart, generate_report_pdf
+
+
+def sample_report(test_count):
+    rng = random.Random(42)
+    tests = [
+        {
+            "test_name": f"test_{i}",
+            # Spread over several decades so the log-scale path is used
+            "value": round(10 ** rng.uniform(0, 5), 2),
+            "unit": "mg/dL",
+            "reference_range": "1 - 100",
+        }
+        for i in range(test_count)
+    ]
+
+    report = {
+        "id": "benchmark",
+        "created_at": "2025-01-01T00:00:00",
+        "confirmed_data": {"patient": {"gender": "male"}, "tests": tests},
+    }
+    analysis = {
+        "care_score": 70,
+        "deviations": {t["test_name"]: "high" for t in tests[:3]},
+        "explanation": "Benchmark report.",
+    }
+    return report, analysis
+
+
+def _timed(fn, runs):
+    fn()  # warm-up: imports, font loading
+    timings = []
+    result = None
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--tests", type=int, default=12)
+    parser.add_argument("--runs", type=int, default=20)
+    args = parser.parse_args()
+
+    report, analysis = sample_report(args.tests)
+    tests = report["confirmed_data"]["tests"]
+
+    print(f"{args.tests} tests, {args.runs} runs per backend\n")
+    print(f"{'backend':<12}{'chart mean':>12}{'chart best':>12}{'pdf mean':>12}{'pdf bytes':>12}")
+
+    for backend in CHART_BACKENDS:
+        try:
+            chart_times, _ = _timed(lambda: generate_biomarker_chart(tests, backend), args.runs)
+            pdf_times, pdf = _timed(
+                lambda: generate_report_pdf(report, analysis, chart_backend=backend),
+                args.runs
+            )
+        except ImportError as e:
+            print(f"{backend:<12}skipped ({e})")
+            continue
+
+        print(
+            f"{backend:<12}"
+            f"{statistics.mean(chart_times):>10.1f}ms"
+            f"{min(chart_times):>10.1f}ms"
+            f"{statistics.mean(pdf_times):>10.1f}ms"
+            f"{len(pdf.getvalue()):>12,}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Per-render cost of the shared PDF template.
+
+Renders synthetic reports of roughly 1, 10 and 50 pages twice: once
+building a fresh PDFTemplate for every render (styles, table style and
+logo decode, as every render used to) and once reusing the process-wide
+template from get_pdf_template(). Prints mean/best render time and the
+page count of the output for both.
+
+Usage:
+    python scripts/benchmark_pdf_template.py [--pages 1,10,50] [--runs 10]
+"""
+
+import argparse
+import os
+import re
+import statistics
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from scripts.benchmark_pdf_charts import sample_report, _timed
+from services.pdf_services import PDFTemplate, generate_report_pdf, get_pdf_template
+
+
+# Explanation paragraphs per extra page, measured on the current layout
+PARAGRAPHS_PER_PAGE = 6
+
+FILLER = (
+    "This paragraph pads the explanation section so the report spans "
+    "several pages. It is long enough to wrap over a few lines of body "
+    "text, which is what a detailed AI explanation looks like in practice. "
+) * 3
+
+
+def paged_report(pages):
+    report, analysis = sample_report(12)
+    analysis["explanation"] = "\n\n".join(
+        FILLER for _ in range((pages - 1) * PARAGRAPHS_PER_PAGE)
+    ) or "Benchmark report."
+    return report, analysis
+
+
+def page_count(pdf_bytes):
+    return len(re.findall(rb"/Type /Page\b", pdf_bytes))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--pages", default="1,10,50")
+    parser.add_argument("--runs", type=int, default=10)
+    args = parser.parse_args()
+
+    print(f"{args.runs} runs per case\n")
+    print(f"{'pages':>6}{'template':>10}{'mean':>12}{'best':>12}{'per page':>12}")
+
+    for target in (int(p) for p in args.pages.split(",")):
+        report, analysis = paged_report(target)
+
+        for label, template in (("fresh", PDFTemplate), ("shared", get_pdf_template)):
+            timings, pdf = _timed(
+                lambda: generate_report_pdf(report, analysis, template=template()),
+                args.runs
+            )
+            pages = page_count(pdf.getvalue())
+            print(
+                f"{pages:>6}{label:>10}"
+                f"{statistics.mean(timings):>10.1f}ms"
+                f"{min(timings):>10.1f}ms"
+                f"{statistics.mean(timings) / pages:>10.2f}ms"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""
+Checks that image preprocessing does not hurt extraction quality.
+
+Runs Gemini Vision on every image in a fixture directory twice, once on
+the raw upload and once on the preprocessed image, and compares the
+extracted tests. If a fixture has a sibling <name>.expected.json, both
+runs are also scored against it.
+
+Usage:
+    python scripts/check_preprocessing.py fixtures/reports [--min-agreement 0.95]
+
+Needs GEMINI_API_KEY. Exits non-zero if agreement drops below the bound.
+"""
+
+import argparse
+import json
+import mimetypes
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from dotenv import load_dotenv
+
+from services.gemini_vision import extract_data_from_image
+from services.image_preprocessor import preprocess_image
+
+
+IMAGE_EXTENSIONS = {".png", ".jpg", ".jpeg", ".webp"}
+
+
+def _tests_by_name(data):
+    tests = {}
+    for t in (data or {}).get("tests", []) or []:
+        name = str(t.get("test_name") or "").strip().lower()
+        if name:
+            tests[name] = (t.get("value"), t.get("unit"))
+    return tests
+
+
+def _values_match(a, b):
+    try:
+        return abs(float(a) - float(b)) <= 1e-6 * max(1.0, abs(float(b)))
+    except (TypeError, ValueError):
+        return str(a).strip().lower() == str(b).strip().lower()
+
+
+def agreement(candidate, reference):
+    """Share of reference tests whose value the candidate reproduced."""
+    ref = _tests_by_name(reference)
+    got = _tests_by_name(candidate)
+    if not ref:
+        return 1.0
+
+    matched = sum(
+        1 for name, (value, _) in ref.items()
+        if name in got and _values_match(got[name][0], value)
+    )
+    return matched / len(ref)
+
+
+def _extract(image_bytes, mime_type, preprocess):
+    result = extract_data_from_image(
+        image_bytes,
+        mime_type,
+        preprocess=preprocess,
+        use_cache=False
+    )
+    if not result.get("success"):
+        raise RuntimeError(f"{result.get('error')}: {result.get('message')}")
+    return result["data"]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("fixtures")
+    parser.add_argument("--min-agreement", type=float, default=0.95)
+    args = parser.parse_args()
+
+    load_dotenv()
+
+    files = sorted(
+        f for f in os.listdir(args.fixtures)
+        if os.path.splitext(f)[1].lower() in IMAGE_EXTENSIONS
+    )
+    if not files:
+        print(f"No fixture images in {args.fixtures}")
+        return 1
+
+    scores = []
+    total_in = total_out = 0
+
+    for name in files:
+        path = os.path.join(args.fixtures, name)
+        with open(path, "rb") as f:
+            raw = f.read()
+        mime_type = mimetypes.guess_type(name)[0] or "image/jpeg"
+
+        _, _, stats = preprocess_image(raw, mime_type)
+        total_in += stats.get("original_bytes", len(raw))
+        total_out += stats.get("output_bytes", len(raw))
+
+        raw_data = _extract(raw, mime_type, preprocess=False)
+        prep_data = _extract(raw, mime_type, preprocess=True)
+
+        expected_path = os.path.splitext(path)[0] + ".expected.json"
+        if os.path.exists(expected_path):
+            with open(expected_path) as f:
+                expected = json.load(f)
+            score = agreement(prep_data, expected)
+            baseline = agreement(raw_data, expected)
+        else:
+            score = agreement(prep_data, raw_data)
+            baseline = 1.0
+
+        scores.append(score)
+        print(
+            f"{name}: agreement={score:.2f} baseline={baseline:.2f} "
+            f"bytes {stats.get('original_bytes', len(raw))} -> "
+            f"{stats.get('output_bytes', len(raw))} "
+            f"({stats.get('elapsed_ms', 0)} ms)"
+        )
+
+    mean = sum(scores) / len(scores)
+    saved = 1 - total_out / total_in if total_in else 0.0
+    print(f"\nmean agreement {mean:.3f}, bytes saved {saved:.1%} over {len(files)} images")
+
+    return 0 if mean >= args.min_agreement else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
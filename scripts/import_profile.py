@@ -0,0 +1,117 @@
+"""
+Startup import profile of the backend.
+
+Imports a module (default: app) in a fresh interpreter with
+`python -X importtime`, parses the report and prints the total import
+time plus the most expensive top-level packages and modules. Use it to
+spot startup regressions, e.g. a route module importing a heavy
+dependency at module level.
+
+Usage:
+    python scripts/import_profile.py [--module app] [--top 15] [--runs 3]
+                                     [--budget-ms 800] [--json]
+
+--runs takes the best of several runs to smooth out disk cache noise.
+Exits non-zero if the total exceeds --budget-ms.
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+
+ROOT = os.path.join(os.path.dirname(__file__), "..")
+
+
+def parse_importtime(stderr: str):
+    """
+    "import time: self [us] | cumulative | imported package" lines ->
+    [(name, depth, self_us, cumulative_us)] in report order.
+    """
+    entries = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+
+        try:
+            self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        except ValueError:
+            continue
+
+        depth = (len(name) - len(name.lstrip(" "))) // 2
+        entries.append((name.strip(), depth, int(self_us), int(cumulative_us)))
+
+    return entries
+
+
+def profile(module: str):
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        raise SystemExit(f"Importing {module} failed:\n{result.stderr[-2000:]}")
+    return parse_importtime(result.stderr)
+
+
+def summarize(entries, top: int):
+    total_us = sum(self_us for _, _, self_us, _ in entries)
+
+    packages = {}
+    for name, _, self_us, _ in entries:
+        root = name.split(".", 1)[0]
+        packages[root] = packages.get(root, 0) + self_us
+
+    return {
+        "total_ms": round(total_us / 1000, 1),
+        "modules": len(entries),
+        "packages": sorted(
+            ({"name": n, "ms": round(us / 1000, 1)} for n, us in packages.items()),
+            key=lambda p: p["ms"],
+            reverse=True
+        )[:top],
+        "slowest_modules": sorted(
+            ({"name": n, "self_ms": round(s / 1000, 1), "cumulative_ms": round(c / 1000, 1)}
+             for n, _, s, c in entries),
+            key=lambda m: m["self_ms"],
+            reverse=True
+        )[:top],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--module", default="app")
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--budget-ms", type=float)
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+
+    summary = min(
+        (summarize(profile(args.module), args.top) for _ in range(max(1, args.runs))),
+        key=lambda s: s["total_ms"]
+    )
+
+    if args.json:
+        print(json.dumps(summary, indent=2))
+    else:
+        print(f"import {args.module}: {summary['total_ms']} ms, {summary['modules']} modules\n")
+        print("Top packages (self time):")
+        for p in summary["packages"]:
+            print(f"  {p['ms']:>8.1f} ms  {p['name']}")
+        print("\nSlowest modules (self / cumulative):")
+        for m in summary["slowest_modules"]:
+            print(f"  {m['self_ms']:>8.1f} / {m['cumulative_ms']:>8.1f} ms  {m['name']}")
+
+    if args.budget_ms is not None and summary["total_ms"] > args.budget_ms:
+        print(f"\nOver budget: {summary['total_ms']} ms > {args.budget_ms} ms", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,21 +1,121 @@
 import os
 import json
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain_google_genai.chat_models import ChatGoogleGenerativeAIError
-from langchain_core.messages import HumanMessage
+from functools import lru_cache
 
+from services.llm_client import invoke_llm, LLMInvocationError
+from utils.helpers import parse_reference_range
 
-def calculate_care_score(enriched_tests: list):
+
+BASE_SCORE = 100
+DEVIATION_PENALTY = 10
+
+# "local" (default) scores with plain arithmetic, "gemini" keeps the old LLM path
+CARE_SCORE_ENGINE = os.getenv("CARE_SCORE_ENGINE", "local").lower()
+
+
+# Range strings repeat across reports, so parsing them once is enough
+_parse_range = lru_cache(maxsize=2048)(parse_reference_range)
+
+
+def _coerce_range(reference_range):
     """
-    Uses Gemini to evaluate test deviations and calculate CareScore (0–100).
-    Explicitly handles Gemini quota exhaustion.
+    Accepts either a resolved {"min", "max"} dict or the formatted
+    string written by the analyze route ("13.2 - 16.6 g/dL").
     """
+    if isinstance(reference_range, dict):
+        return reference_range
+    if not isinstance(reference_range, str):
+        return None
+    return _parse_range(reference_range)
 
-    llm = ChatGoogleGenerativeAI(
-        model="gemini-2.5-flash",
-        temperature=0,
-        google_api_key=os.getenv("GEMINI_API_KEY")
-    )
+
+def _to_float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return float("nan")
+
+
+def classify_tests(enriched_tests: list):
+    """
+    Classifies every test as low / normal / high against its range.
+    Tests without a numeric value or a usable range count as normal,
+    since there is nothing to compare them against.
+    """
+    import numpy as np
+
+    n = len(enriched_tests)
+    values = np.empty(n, dtype=float)
+    mins = np.full(n, -np.inf)
+    maxs = np.full(n, np.inf)
+
+    for i, test in enumerate(enriched_tests):
+        values[i] = _to_float(test.get("value"))
+
+        ref = _coerce_range(test.get("reference_range"))
+        if not ref:
+            continue
+        if ref.get("min") is not None:
+            mins[i] = ref["min"]
+        if ref.get("max") is not None:
+            maxs[i] = ref["max"]
+
+    # NaN comparisons are always False, so missing values fall through to normal
+    low = values < mins
+    high = values > maxs
+
+    statuses = np.where(low, "low", np.where(high, "high", "normal"))
+
+    return {
+        test.get("test_name"): str(status)
+        for test, status in zip(enriched_tests, statuses)
+    }
+
+
+def score_deviations(deviations: dict) -> int:
+    penalties = sum(1 for s in deviations.values() if s != "normal")
+    return max(0, BASE_SCORE - DEVIATION_PENALTY * penalties)
+
+
+def _calculate_care_score_local(enriched_tests: list):
+    deviations = classify_tests(enriched_tests)
+
+    return {
+        "success": True,
+        "source": "local",
+        "data": {
+            "score": score_deviations(deviations),
+            "deviations": deviations
+        }
+    }
+
+
+def calculate_care_score(enriched_tests: list, engine: str | None = None):
+    """
+    Calculates CareScore (0–100) from test deviations.
+    Runs locally by default; pass engine="gemini" (or set
+    CARE_SCORE_ENGINE=gemini) to use the LLM instead.
+    """
+    engine = (engine or CARE_SCORE_ENGINE).lower()
+
+    if engine == "gemini":
+        return _calculate_care_score_gemini(enriched_tests)
+
+    try:
+        return _calculate_care_score_local(enriched_tests)
+    except Exception as e:
+        return {
+            "success": False,
+            "error": "INTERNAL_ERROR",
+            "message": str(e)
+        }
+
+
+def _calculate_care_score_gemini(enriched_tests: list):
+    """
+    Uses Gemini to evaluate test deviations and calculate CareScore (0–100).
+    Gemini failures come back with their LLMInvocationError code.
+    """
 
     prompt = f"""
 You are a medical analysis engine.
@@ -50,8 +150,10 @@ Output JSON format:
 }}
 """
 
+    from langchain_core.messages import HumanMessage
+
     try:
-        response = llm.invoke([HumanMessage(content=prompt)])
+        response = invoke_llm([HumanMessage(content=prompt)], temperature=0)
 
         content = (
             response.content
@@ -66,22 +168,8 @@ Output JSON format:
             "data": json.loads(content)
         }
 
-    except ChatGoogleGenerativeAIError as e:
-        error_msg = str(e)
-
-       
-        if "RESOURCE_EXHAUSTED" in error_msg or "429" in error_msg:
-            return {
-                "success": False,
-                "error": "QUOTA_EXHAUSTED",
-                "message": "Gemini API quota exhausted. Please retry after some time."
-            }
-
-        return {
-            "success": False,
-            "error": "GEMINI_ERROR",
-            "message": "Gemini failed to calculate care score."
-        }
+    except LLMInvocationError as e:
+        return e.to_response()
 
     except json.JSONDecodeError:
         return {
@@ -0,0 +1,131 @@
+from database.db_service import DBService
+from services.graph_service import downsample_lttb, parse_report_date
+from services.reference_service import find_test_reference, normalize_test_name
+from services.unit_conversion import convert_value
+from utils.concurrency import io_executor, log_failures
+
+
+def build_biomarker_rows(report, confirmed_data, deviations):
+    """
+    Flattens confirmed tests into one row per biomarker. Values are
+    converted to the reference unit when the offline table allows it,
+    so a series stays comparable across labs. Non-numeric values are
+    skipped.
+    """
+    rows = {}
+
+    for test in confirmed_data.get("tests", []):
+        try:
+            value = float(test.get("value"))
+        except (TypeError, ValueError):
+            continue
+
+        unit = test.get("unit")
+        ref = find_test_reference(test.get("test_name", ""))
+
+        if ref:
+            test_key = ref["test_key"]
+            converted = convert_value(test_key, value, unit, ref["unit"])
+            if converted is not None:
+                value, unit = converted, ref["unit"]
+        else:
+            test_key = normalize_test_name(test.get("test_name", ""))
+
+        if not test_key:
+            continue
+
+        rows[test_key] = {
+            "user_id": report["user_id"],
+            "report_id": str(report["id"]),
+            "test_key": test_key,
+            "measured_at": report["created_at"],
+            "value": value,
+            "unit": unit,
+            "status": deviations.get(test.get("test_name")),
+        }
+
+    return list(rows.values())
+
+
+def record_biomarkers(report_id, confirmed_data, deviations):
+    report = DBService.get_report_by_id(report_id)
+    if not report:
+        return []
+
+    rows = build_biomarker_rows(report, confirmed_data, deviations)
+    return DBService.save_biomarker_points(rows)
+
+
+def backfill_biomarker_series(page_size=100, dry_run=False):
+    """
+    Writes series rows for every analyzed report, e.g. reports analyzed
+    before the series existed. Rows are upserted, so it is safe to re-run.
+    Returns (reports, rows).
+    """
+    reports = rows_written = 0
+    after_id = None
+
+    while True:
+        page = DBService.get_analyzed_reports_page(after_id, page_size)
+        if not page:
+            break
+
+        for report in page:
+            analysis = report.get("analysis_data") or {}
+            deviations = analysis.get("deviations")
+            rows = build_biomarker_rows(
+                report,
+                report.get("confirmed_data") or {},
+                deviations if isinstance(deviations, dict) else {}
+            )
+            if rows and not dry_run:
+                DBService.save_biomarker_points(rows)
+            reports += 1
+            rows_written += len(rows)
+
+        after_id = page[-1]["id"]
+
+    return reports, rows_written
+
+
+def record_biomarkers_async(report_id, confirmed_data, deviations):
+    """Writes the series rows off the request thread; failures are only logged."""
+    return log_failures(
+        io_executor.submit(record_biomarkers, report_id, confirmed_data, deviations),
+        "BIOMARKER SERIES"
+    )
+
+
+def get_biomarker_trends(user_id, test_keys=None, max_points=None):
+    """
+    Returns {test_key: {"dates", "values", "unit", "statuses"}} columns.
+    Series longer than max_points are downsampled with LTTB.
+    """
+    series = {}
+
+    for row in DBService.get_biomarker_series(user_id, test_keys):
+        entry = series.setdefault(row["test_key"], {
+            "dates": [],
+            "values": [],
+            "statuses": [],
+            "unit": row.get("unit"),
+        })
+        entry["dates"].append(row["measured_at"])
+        entry["values"].append(row["value"])
+        entry["statuses"].append(row.get("status"))
+
+    if max_points:
+        for entry in series.values():
+            if len(entry["values"]) <= max_points:
+                continue
+
+            parsed = [parse_report_date(d) for d in entry["dates"]]
+            if None in parsed:
+                continue
+
+            xs = [d.timestamp() for d in parsed]
+            keep = downsample_lttb(xs, entry["values"], max_points)
+            for column in ("dates", "values", "statuses"):
+                entry[column] = [entry[column][i] for i in keep]
+
+    return series
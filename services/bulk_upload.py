@@ -0,0 +1,246 @@
+import io
+import mimetypes
+import os
+import zipfile
+import zlib
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from database.db_service import DBService
+from services.job_queue import JobFailed
+from services.upload_pipeline import stage_upload, discard_staged
+from utils.constants import ALLOWED_EXTENSIONS, MAX_CONTENT_LENGTH
+
+
+BULK_UPLOAD_CONCURRENCY = int(os.getenv("BULK_UPLOAD_CONCURRENCY", "4"))
+BULK_UPLOAD_MAX_FILES = int(os.getenv("BULK_UPLOAD_MAX_FILES", "50"))
+# Decompressed bytes across every file of one bulk upload
+BULK_UPLOAD_MAX_TOTAL_BYTES = int(os.getenv("BULK_UPLOAD_MAX_TOTAL_BYTES", str(100 * 1024 * 1024)))
+
+_READ_CHUNK = 1024 * 1024
+
+_SUPPORTED_COMPRESSION = {
+    zipfile.ZIP_STORED,
+    zipfile.ZIP_DEFLATED,
+    zipfile.ZIP_BZIP2,
+    zipfile.ZIP_LZMA,
+}
+
+
+class BulkUploadError(Exception):
+    pass
+
+
+def _is_zip(filename, content_type):
+    return (
+        (filename or "").lower().endswith(".zip")
+        or content_type in ("application/zip", "application/x-zip-compressed")
+    )
+
+
+def _allowed(filename):
+    return filename.rsplit(".", 1)[-1].lower() in ALLOWED_EXTENSIONS
+
+
+def _check_file_count(count):
+    if count > BULK_UPLOAD_MAX_FILES:
+        raise BulkUploadError(
+            f"Too many files ({count}); the limit is {BULK_UPLOAD_MAX_FILES}"
+        )
+
+
+def _check_file_size(name, size):
+    if size > MAX_CONTENT_LENGTH:
+        raise BulkUploadError(
+            f"{name} is too large; the limit is {MAX_CONTENT_LENGTH // (1024 * 1024)}MB per file"
+        )
+
+
+def _check_total_size(total):
+    if total > BULK_UPLOAD_MAX_TOTAL_BYTES:
+        raise BulkUploadError(
+            f"Upload is too large; the limit is {BULK_UPLOAD_MAX_TOTAL_BYTES // (1024 * 1024)}MB in total"
+        )
+
+
+def _check_member_readable(archive_name, info):
+    name = os.path.basename(info.filename)
+    if info.flag_bits & 0x1:
+        raise BulkUploadError(f"{archive_name}: {name} is encrypted")
+    if info.compress_type not in _SUPPORTED_COMPRESSION:
+        raise BulkUploadError(
+            f"{archive_name}: {name} uses an unsupported compression method ({info.compress_type})"
+        )
+
+
+def _read_member(archive, info, total):
+    """
+    Decompresses one ZIP member in chunks, counting the bytes actually
+    produced rather than trusting the header, and stops as soon as the
+    member passes the per-file limit or the upload passes the total one.
+    """
+    chunks = []
+    size = 0
+
+    with archive.open(info) as member:
+        while True:
+            chunk = member.read(_READ_CHUNK)
+            if not chunk:
+                break
+
+            size += len(chunk)
+            _check_file_size(info.filename, size)
+            _check_total_size(total + size)
+            chunks.append(chunk)
+
+    return b"".join(chunks)
+
+
+def _is_report_image(info):
+    name = os.path.basename(info.filename)
+    return not (
+        info.is_dir()
+        or not name
+        or name.startswith(".")
+        or info.filename.startswith("__MACOSX/")
+        or not _allowed(name)
+    )
+
+
+def collect_upload_files(uploads):
+    """
+    Turns the uploaded files (plain images and/or ZIP archives) into
+    [(filename, bytes, content_type)]. ZIP members that are not report
+    images are skipped. The file count and the declared size of every
+    ZIP member are checked before anything is decompressed, and the
+    decompressed total is capped at BULK_UPLOAD_MAX_TOTAL_BYTES.
+    """
+    files = []
+    total = 0
+
+    for upload in uploads:
+        data = upload.read()
+
+        if not _is_zip(upload.filename, upload.content_type):
+            if not _allowed(upload.filename or ""):
+                raise BulkUploadError(f"{upload.filename} is not a supported image type")
+            _check_file_size(upload.filename, len(data))
+            _check_file_count(len(files) + 1)
+            total += len(data)
+            _check_total_size(total)
+            files.append((upload.filename, data, upload.content_type))
+            continue
+
+        try:
+            archive = zipfile.ZipFile(io.BytesIO(data))
+        except zipfile.BadZipFile:
+            raise BulkUploadError(f"{upload.filename} is not a valid ZIP file")
+
+        with archive:
+            members = [
+                info for info in archive.infolist()
+                if _is_report_image(info)
+            ]
+
+            _check_file_count(len(files) + len(members))
+            for info in members:
+                _check_member_readable(upload.filename, info)
+                _check_file_size(info.filename, info.file_size)
+
+            for info in members:
+                name = os.path.basename(info.filename)
+                try:
+                    content = _read_member(archive, info, total)
+                except (zipfile.BadZipFile, NotImplementedError, RuntimeError, EOFError, zlib.error) as e:
+                    raise BulkUploadError(f"{upload.filename}: {name} is corrupt ({e})")
+                total += len(content)
+
+                files.append((
+                    name,
+                    content,
+                    mimetypes.guess_type(name)[0] or "application/octet-stream"
+                ))
+
+    return files
+
+
+def run_bulk_upload(user_id, files):
+    """
+    Stages every file (storage upload + extraction) with at most
+    BULK_UPLOAD_CONCURRENCY in flight, yielding a result per file as it
+    completes. Successful files are then created with one batched insert,
+    and a final summary with their report ids is yielded.
+    """
+    staged = {}
+
+    with ThreadPoolExecutor(
+        max_workers=max(1, min(BULK_UPLOAD_CONCURRENCY, len(files))),
+        thread_name_prefix="bulk-upload"
+    ) as pool:
+        futures = {
+            pool.submit(stage_upload, user_id, data, filename, content_type): (index, filename)
+            for index, (filename, data, content_type) in enumerate(files)
+        }
+
+        try:
+            for future in as_completed(futures):
+                index, filename = futures[future]
+                result = {"type": "file", "index": index, "filename": filename}
+
+                try:
+                    staged[index] = future.result()
+                    result["success"] = True
+                except JobFailed as e:
+                    result.update(success=False, error=e.error, message=e.message, **e.details)
+                except Exception as e:
+                    result.update(success=False, error="UPLOAD_FAILED", message=str(e))
+
+                yield result
+
+        except GeneratorExit:
+            # Client went away: skip queued files and remove what was stored
+            for future in futures:
+                future.cancel()
+            for future, (index, _) in futures.items():
+                if future.cancelled():
+                    continue
+                try:
+                    staged.setdefault(index, future.result())
+                except Exception:
+                    pass
+            for item in staged.values():
+                discard_staged(None, item["file_path"])
+            raise
+
+    order = sorted(staged)
+    try:
+        reports = DBService.create_reports([
+            {
+                "user_id": user_id,
+                "file_url": staged[i]["file_url"],
+                "raw_data": staged[i]["raw_data"],
+            }
+            for i in order
+        ])
+    except Exception as e:
+        for i in order:
+            discard_staged(None, staged[i]["file_path"])
+        yield {
+            "type": "summary",
+            "success": False,
+            "error": "INSERT_FAILED",
+            "message": str(e),
+            "created": 0,
+            "failed": len(files),
+        }
+        return
+
+    yield {
+        "type": "summary",
+        "success": True,
+        "reports": [
+            {"index": i, "filename": files[i][0], "report_id": report["id"]}
+            for i, report in zip(order, reports)
+        ],
+        "created": len(reports),
+        "failed": len(files) - len(reports),
+    }
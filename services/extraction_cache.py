@@ -0,0 +1,130 @@
+import copy
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+
+from utils.cache import LocalCache
+
+
+EXTRACTION_CACHE_SIZE = int(os.getenv("EXTRACTION_CACHE_SIZE", "256"))
+EXTRACTION_CACHE_DIR = os.getenv(
+    "EXTRACTION_CACHE_DIR",
+    os.path.join(os.path.dirname(__file__), "..", ".cache", "extractions")
+)
+
+
+def extraction_version(*parts) -> str:
+    """
+    Short fingerprint of everything besides the image that shapes the
+    extraction (prompt text, model, ...). Changing any part changes the
+    version, so stale entries are never served.
+    """
+    digest = hashlib.sha256("\x00".join(str(p) for p in parts).encode("utf-8"))
+    return digest.hexdigest()[:16]
+
+
+class ExtractionCache:
+    """
+    Two-tier cache of parsed extraction results keyed by image hash:
+    a bounded in-memory LRU in front of JSON files on local disk.
+    Disk entries live under a directory per extraction version.
+    """
+
+    def __init__(self, directory: str, maxsize: int):
+        self.directory = directory
+        self._memory = LocalCache(maxsize)
+        self._lock = threading.Lock()
+        self._purged_versions = set()
+        self.disk_hits = 0
+        self.stores = 0
+
+    def make_key(self, image_bytes: bytes, version: str) -> str:
+        return f"{version}:{hashlib.sha256(image_bytes).hexdigest()}"
+
+    def _path(self, key: str) -> str:
+        version, digest = key.split(":", 1)
+        return os.path.join(self.directory, version, f"{digest}.json")
+
+    def get(self, key: str):
+        data = self._memory.get(key)
+        if data is not None:
+            return copy.deepcopy(data)
+
+        try:
+            with open(self._path(key), "r") as f:
+                data = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return None
+
+        with self._lock:
+            self.disk_hits += 1
+        self._memory.set(key, data)
+        return copy.deepcopy(data)
+
+    def set(self, key: str, data):
+        self._memory.set(key, copy.deepcopy(data))
+
+        version = key.split(":", 1)[0]
+        self.purge_stale(version)
+
+        path = self._path(key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+            with os.fdopen(fd, "w") as f:
+                json.dump(data, f)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"Extraction cache write failed: {e}")
+            return
+
+        with self._lock:
+            self.stores += 1
+
+    def purge_stale(self, current_version: str):
+        """Deletes disk entries written by any other extraction version."""
+        if current_version in self._purged_versions:
+            return
+
+        with self._lock:
+            if current_version in self._purged_versions:
+                return
+
+            if os.path.isdir(self.directory):
+                for name in os.listdir(self.directory):
+                    if name != current_version:
+                        shutil.rmtree(
+                            os.path.join(self.directory, name),
+                            ignore_errors=True
+                        )
+
+            self._purged_versions.add(current_version)
+
+    def clear(self):
+        self._memory.clear()
+        with self._lock:
+            shutil.rmtree(self.directory, ignore_errors=True)
+            self._purged_versions.clear()
+
+    def stats(self):
+        memory = self._memory.stats()
+        with self._lock:
+            disk_hits = self.disk_hits
+            stores = self.stores
+
+        lookups = memory["hits"] + memory["misses"]
+        misses = memory["misses"] - disk_hits
+        return {
+            "memory_size": memory["size"],
+            "memory_hits": memory["hits"],
+            "disk_hits": disk_hits,
+            "misses": misses,
+            "stores": stores,
+            "hit_ratio": round((lookups - misses) / lookups, 3) if lookups else 0.0,
+        }
+
+
+extraction_cache = ExtractionCache(EXTRACTION_CACHE_DIR, EXTRACTION_CACHE_SIZE)
@@ -1,17 +1,86 @@
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain_google_genai.chat_models import ChatGoogleGenerativeAIError
-from langchain_core.prompts import PromptTemplate
+import hashlib
+import json
 import os
+from functools import lru_cache
 
+from services.llm_client import invoke_llm, stream_llm, LLMInvocationError
 from services.reference_resolver import resolve_test_reference
+from utils.cache import LocalCache
 
 
-def generate_health_explanation(confirmed_data, deviations):
+EXPLANATION_TEMPERATURE = 0.3
+
+EXPLANATION_TEMPLATE = """
+You are a medical assistant.
+
+Explain the following blood test results in simple, patient-friendly language.
+
+Data:
+{data}
+
+Rules:
+- Use the provided reference ranges only
+- Explain abnormal values generally
+- No diagnosis
+- No treatment plans
+- Keep the explanation under 150 words
+"""
+
+
+@lru_cache(maxsize=1)
+def explanation_prompt():
+    # Built on first use so importing this module does not load langchain
+    from langchain_core.prompts import PromptTemplate
+
+    return PromptTemplate(
+        input_variables=["data"],
+        template=EXPLANATION_TEMPLATE
+    )
+
+
+explanation_cache = LocalCache(
+    maxsize=int(os.getenv("EXPLANATION_CACHE_SIZE", "1024")),
+    ttl=float(os.getenv("EXPLANATION_CACHE_TTL", "86400"))
+)
+
+
+def _canonical_value(value):
+    try:
+        return round(float(value), 4)
+    except (TypeError, ValueError):
+        return value
+
+
+def explanation_fingerprint(enriched_tests: list) -> str:
     """
-    Generates user-friendly explanation of results.
-    Explicitly handles Gemini quota exhaustion.
+    Stable hash of what the explanation depends on: names, values, units,
+    ranges and statuses. Test order and numeric spelling ("5" vs 5.0) do
+    not change it; the prompt template does.
     """
+    canonical = sorted(
+        (
+            {
+                "test_name": str(t.get("test_name", "")).strip().lower(),
+                "value": _canonical_value(t.get("value")),
+                "unit": t.get("unit"),
+                "reference_range": t.get("reference_range"),
+                "status": t.get("status"),
+            }
+            for t in enriched_tests
+        ),
+        key=lambda t: t["test_name"]
+    )
 
+    payload = json.dumps(
+        [EXPLANATION_TEMPLATE, EXPLANATION_TEMPERATURE, canonical],
+        sort_keys=True,
+        separators=(",", ":"),
+        default=str
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def build_enriched_tests(confirmed_data, deviations):
     gender = confirmed_data.get("patient", {}).get("gender", "").lower()
 
     enriched_tests = []
@@ -27,39 +96,36 @@ def generate_health_explanation(confirmed_data, deviations):
             "status": deviations.get(test["test_name"])
         })
 
-    llm_text = ChatGoogleGenerativeAI(
-        model="gemini-2.5-flash",
-        temperature=0.3,
-        google_api_key=os.getenv("GEMINI_API_KEY")
-    )
-
-    template = """
-You are a medical assistant.
+    return enriched_tests
 
-Explain the following blood test results in simple, patient-friendly language.
 
-Data:
-{data}
+def generate_health_explanation(confirmed_data, deviations):
+    """
+    Generates user-friendly explanation of results.
+    Identical inputs are served from the explanation cache.
+    Gemini failures come back with their LLMInvocationError code.
+    """
 
-Rules:
-- Use the provided reference ranges only
-- Explain abnormal values generally
-- No diagnosis
-- No treatment plans
-- Keep the explanation under 150 words
-"""
+    try:
+        enriched_tests = build_enriched_tests(confirmed_data, deviations)
 
-    prompt = PromptTemplate(
-        input_variables=["data"],
-        template=template
-    )
+        fingerprint = explanation_fingerprint(enriched_tests)
+        cached = explanation_cache.get(fingerprint)
+        if cached:
+            return {
+                "success": True,
+                "source": "cache",
+                "content": cached
+            }
 
-    chain = prompt | llm_text
+        response = invoke_llm(
+            explanation_prompt().format(data=enriched_tests),
+            temperature=EXPLANATION_TEMPERATURE
+        )
 
-    try:
-        response = chain.invoke({
-            "data": enriched_tests
-        })
+        # A blank answer is not worth serving again for the cache's TTL
+        if response.content and response.content.strip():
+            explanation_cache.set(fingerprint, response.content)
 
         return {
             "success": True,
@@ -67,23 +133,8 @@ Rules:
             "content": response.content
         }
 
-    except ChatGoogleGenerativeAIError as e:
-        error_msg = str(e)
-
-        
-        if "RESOURCE_EXHAUSTED" in error_msg or "429" in error_msg:
-            return {
-                "success": False,
-                "error": "QUOTA_EXHAUSTED",
-                "message": "Gemini API quota exhausted. Please retry after some time."
-            }
-
-        
-        return {
-            "success": False,
-            "error": "GEMINI_ERROR",
-            "message": "Gemini failed to generate explanation."
-        }
+    except LLMInvocationError as e:
+        return e.to_response()
 
     except Exception as e:
         return {
@@ -91,3 +142,34 @@ Rules:
             "error": "INTERNAL_ERROR",
             "message": str(e)
         }
+
+
+def stream_health_explanation(confirmed_data, deviations):
+    """
+    Yields the explanation text in chunks as Gemini generates it.
+    A cached explanation is yielded in one piece. Gemini failures are
+    raised as LLMInvocationError to the caller, which is already
+    streaming its own response.
+    """
+
+    enriched_tests = build_enriched_tests(confirmed_data, deviations)
+
+    fingerprint = explanation_fingerprint(enriched_tests)
+    cached = explanation_cache.get(fingerprint)
+    if cached:
+        yield cached
+        return
+
+    parts = []
+    for chunk in stream_llm(
+        explanation_prompt().format(data=enriched_tests),
+        temperature=EXPLANATION_TEMPERATURE
+    ):
+        text = chunk.text
+        if text:
+            parts.append(text)
+            yield text
+
+    text = "".join(parts)
+    if text.strip():
+        explanation_cache.set(fingerprint, text)
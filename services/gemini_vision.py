@@ -1,51 +1,15 @@
 import base64
 import json
-import os
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain_google_genai.chat_models import ChatGoogleGenerativeAIError
-from langchain_core.messages import HumanMessage
 
+from services.extraction_cache import extraction_cache, extraction_version
+from services.image_preprocessor import preprocess_image, preprocessing_signature
+from services.llm_client import invoke_llm, LLMInvocationError
 
-def _safe_json_parse(text: str):
-    """
-    Attempts to parse JSON with minimal cleanup.
-    If this fails, AI is considered failed.
-    """
-    text = text.strip()
-
-    if text.startswith("```"):
-        text = (
-            text.replace("```json", "")
-            .replace("```", "")
-            .strip()
-        )
-
-    try:
-        return json.loads(text)
-    except json.JSONDecodeError:
-        cleaned = text.replace("\n", " ").strip().rstrip(",")
-        return json.loads(cleaned)
 
+EXTRACTION_MODEL = "gemini-2.5-flash"
+EXTRACTION_PARAMS = {"temperature": 0, "top_p": 1.0, "top_k": 1}
 
-def extract_data_from_image(image_bytes: bytes, mime_type: str):
-    """
-    Extracts structured medical data from a lab report image using Gemini Vision.
-
-    HARD RULE:
-    - If AI fails, return success=False (no manual fallback).
-    """
-
-    llm_vision = ChatGoogleGenerativeAI(
-        model="gemini-2.5-flash",
-        temperature=0,
-        top_p=1.0,
-        top_k=1,
-        google_api_key=os.getenv("GEMINI_API_KEY"),
-    )
-
-    image_b64 = base64.b64encode(image_bytes).decode("utf-8")
-
-    prompt = """
+EXTRACTION_PROMPT = """
 You are a medical data extraction engine.
 
 TASK:
@@ -85,9 +49,76 @@ IMPORTANT:
 - Reference range must be a string.
 """
 
+# Cached extractions are only reused while prompt, model, params and
+# image preprocessing settings match
+EXTRACTION_VERSION = extraction_version(
+    EXTRACTION_MODEL,
+    EXTRACTION_PROMPT,
+    sorted(EXTRACTION_PARAMS.items()),
+    preprocessing_signature()
+)
+
+
+def _safe_json_parse(text: str):
+    """
+    Attempts to parse JSON with minimal cleanup.
+    If this fails, AI is considered failed.
+    """
+    text = text.strip()
+
+    if text.startswith("```"):
+        text = (
+            text.replace("```json", "")
+            .replace("```", "")
+            .strip()
+        )
+
+    try:
+        return json.loads(text)
+    except json.JSONDecodeError:
+        cleaned = text.replace("\n", " ").strip().rstrip(",")
+        return json.loads(cleaned)
+
+
+def extract_data_from_image(
+    image_bytes: bytes,
+    mime_type: str,
+    preprocess: bool = True,
+    use_cache: bool = True
+):
+    """
+    Extracts structured medical data from a lab report image using Gemini Vision.
+    The image is preprocessed (orientation, size, grayscale) before encoding;
+    results are cached by the hash of the original upload.
+
+    HARD RULE:
+    - If AI fails, return success=False (no manual fallback).
+    """
+
+    # Cache entries describe preprocessed extractions only
+    use_cache = use_cache and preprocess
+
+    cache_key = extraction_cache.make_key(image_bytes, EXTRACTION_VERSION)
+    if use_cache:
+        cached = extraction_cache.get(cache_key)
+        if cached is not None:
+            return {
+                "success": True,
+                "source": "cache",
+                "data": cached,
+            }
+
+    if preprocess:
+        image_bytes, mime_type, prep_stats = preprocess_image(image_bytes, mime_type)
+        print("IMAGE PREPROCESS:", prep_stats)
+
+    from langchain_core.messages import HumanMessage
+
+    image_b64 = base64.b64encode(image_bytes).decode("utf-8")
+
     message = HumanMessage(
         content=[
-            {"type": "text", "text": prompt},
+            {"type": "text", "text": EXTRACTION_PROMPT},
             {
                 "type": "image_url",
                 "image_url": {
@@ -98,13 +129,15 @@ IMPORTANT:
     )
 
     try:
-        response = llm_vision.invoke([message])
+        response = invoke_llm([message], model=EXTRACTION_MODEL, **EXTRACTION_PARAMS)
         raw_content = response.content.strip()
 
         
         print("RAW GEMINI OUTPUT:", raw_content)
 
         parsed = _safe_json_parse(raw_content)
+        if use_cache:
+            extraction_cache.set(cache_key, parsed)
 
         return {
             "success": True,
@@ -112,21 +145,8 @@ IMPORTANT:
             "data": parsed,
         }
 
-    except ChatGoogleGenerativeAIError as e:
-        error_msg = str(e)
-
-        if "RESOURCE_EXHAUSTED" in error_msg or "429" in error_msg:
-            return {
-                "success": False,
-                "error": "QUOTA_EXHAUSTED",
-                "message": "Gemini Vision quota exhausted.",
-            }
-
-        return {
-            "success": False,
-            "error": "GEMINI_VISION_ERROR",
-            "message": error_msg,
-        }
+    except LLMInvocationError as e:
+        return e.to_response()
 
     except json.JSONDecodeError as e:
         return {
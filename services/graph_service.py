@@ -1,26 +1,136 @@
-def prepare_graph_data(current_report, past_reports):
+from datetime import datetime, timezone
+
+
+def parse_report_date(value):
+    """datetime or ISO string -> naive UTC datetime (None if unparseable)."""
+    if isinstance(value, str):
+        try:
+            value = datetime.fromisoformat(value.replace("Z", "+00:00"))
+        except ValueError:
+            return None
+
+    if not isinstance(value, datetime):
+        return None
+
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def _report_timestamp(report):
+    """Best available report date: upload_date (datetime) or created_at (ISO string)."""
+    return parse_report_date(report.get('upload_date') or report.get('created_at'))
+
+
+def _report_values(confirmed_data):
+    """
+    Numeric test values of one report as {test_name: float}. Handles the
+    current {"patient", "tests": [...]} schema and the older flat
+    {test_name: value} dicts.
+    """
+    if not isinstance(confirmed_data, dict):
+        return {}
+
+    if isinstance(confirmed_data.get("tests"), list):
+        pairs = (
+            (t.get("test_name"), t.get("value"))
+            for t in confirmed_data["tests"]
+            if isinstance(t, dict)
+        )
+    else:
+        pairs = confirmed_data.items()
+
+    values = {}
+    for name, value in pairs:
+        try:
+            values[name] = float(value)
+        except (TypeError, ValueError):
+            continue
+    return values
+
+
+def downsample_lttb(xs, ys, threshold):
+    """
+    Largest-Triangle-Three-Buckets: returns the indices of `threshold`
+    points that keep the visual shape of the (xs, ys) series. First and
+    last points are always kept.
+    """
+    n = len(xs)
+    if threshold >= n or threshold < 3:
+        return list(range(n))
+
+    selected = [0]
+    bucket_size = (n - 2) / (threshold - 2)
+    a = 0
+
+    for i in range(threshold - 2):
+        start = int(i * bucket_size) + 1
+        end = int((i + 1) * bucket_size) + 1
+
+        next_start = end
+        next_end = max(min(int((i + 2) * bucket_size) + 1, n), next_start + 1)
+        next_count = next_end - next_start
+        avg_x = sum(xs[next_start:next_end]) / next_count
+        avg_y = sum(ys[next_start:next_end]) / next_count
+
+        best, best_area = start, -1.0
+        ax, ay = xs[a], ys[a]
+        for j in range(start, end):
+            area = abs((ax - avg_x) * (ys[j] - ay) - (ax - xs[j]) * (avg_y - ay))
+            if area > best_area:
+                best, best_area = j, area
+
+        selected.append(best)
+        a = best
+
+    selected.append(n - 1)
+    return selected
+
+
+def prepare_graph_data(current_report, past_reports, max_points=None):
     """
     Formats data for Matplotlib/Chart.js on the frontend.
-    Focuses on tracking specific biomarkers over time.
+    Tracks every biomarker of the current report across past reports,
+    oldest first: {test: {"dates": [...], "values": [...]}}.
+    Pass max_points to downsample long histories with LTTB.
     """
-    # Identify common keys (tests present in both reports)
-    test_history = {}
-    
-    # Add current data
-    current_date = current_report['upload_date'].strftime("%Y-%m-%d")
-    for test, value in current_report['confirmed_data'].items():
-        if test not in test_history:
-            test_history[test] = {"dates": [], "values": []}
-        test_history[test]["dates"].append(current_date)
-        test_history[test]["values"].append(value)
-
-    # Add past data
-    for report in past_reports:
-        r_date = report['upload_date'].strftime("%Y-%m-%d")
-        if 'confirmed_data' in report:
-            for test, value in report['confirmed_data'].items():
-                if test in test_history:
-                    test_history[test]["dates"].insert(0, r_date)
-                    test_history[test]["values"].insert(0, value)
-
-    return test_history
\ No newline at end of file
+    current_values = _report_values(current_report.get('confirmed_data'))
+    tracked = set(current_values)
+
+    dated_reports = []
+    for report in [current_report, *past_reports]:
+        ts = _report_timestamp(report)
+        if ts is not None:
+            dated_reports.append((ts, report))
+
+    # Sort once; every series is then built by appending
+    dated_reports.sort(key=lambda pair: pair[0])
+
+    test_history = {test: {"timestamps": [], "values": []} for test in tracked}
+
+    for ts, report in dated_reports:
+        values = (
+            current_values if report is current_report
+            else _report_values(report.get('confirmed_data'))
+        )
+        for test, value in values.items():
+            if test in tracked:
+                test_history[test]["timestamps"].append(ts)
+                test_history[test]["values"].append(value)
+
+    graph_data = {}
+    for test, series in test_history.items():
+        timestamps, values = series["timestamps"], series["values"]
+
+        if max_points and len(values) > max_points:
+            xs = [t.timestamp() for t in timestamps]
+            keep = downsample_lttb(xs, values, max_points)
+            timestamps = [timestamps[i] for i in keep]
+            values = [values[i] for i in keep]
+
+        graph_data[test] = {
+            "dates": [t.strftime("%Y-%m-%d") for t in timestamps],
+            "values": values,
+        }
+
+    return graph_data
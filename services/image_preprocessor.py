@@ -0,0 +1,126 @@
+import io
+import os
+import threading
+import time
+
+
+VISION_PREPROCESS = os.getenv("VISION_PREPROCESS", "true").lower() in ("1", "true", "yes")
+VISION_MAX_DIMENSION = int(os.getenv("VISION_MAX_DIMENSION", "2048"))
+VISION_JPEG_QUALITY = int(os.getenv("VISION_JPEG_QUALITY", "85"))
+VISION_GRAYSCALE = os.getenv("VISION_GRAYSCALE", "true").lower() in ("1", "true", "yes")
+
+_totals_lock = threading.Lock()
+_totals = {
+    "images": 0,
+    "skipped": 0,
+    "bytes_in": 0,
+    "bytes_out": 0,
+    "total_ms": 0.0,
+}
+
+
+def preprocessing_signature() -> str:
+    """Settings that change what Gemini sees; part of the extraction cache key."""
+    if not VISION_PREPROCESS:
+        return "raw"
+    return f"max{VISION_MAX_DIMENSION}-q{VISION_JPEG_QUALITY}-{'L' if VISION_GRAYSCALE else 'RGB'}"
+
+
+def _record(stats):
+    with _totals_lock:
+        if stats.get("skipped"):
+            _totals["skipped"] += 1
+            return
+        _totals["images"] += 1
+        _totals["bytes_in"] += stats["original_bytes"]
+        _totals["bytes_out"] += stats["output_bytes"]
+        _totals["total_ms"] += stats["elapsed_ms"]
+
+
+def preprocess_image(image_bytes: bytes, mime_type: str):
+    """
+    Prepares an upload for Gemini Vision: applies EXIF orientation,
+    downscales to VISION_MAX_DIMENSION, optionally converts to grayscale
+    and re-encodes as JPEG. Returns (bytes, mime_type, stats).
+
+    Inputs Pillow cannot read or process (PDFs, unknown formats,
+    decompression bombs) pass through as-is.
+    If re-encoding would not make an upright image smaller, the original
+    bytes are kept.
+    """
+    start = time.perf_counter()
+
+    if not VISION_PREPROCESS:
+        return image_bytes, mime_type, {"skipped": "disabled"}
+
+    from PIL import Image, ImageOps
+
+    try:
+        with Image.open(io.BytesIO(image_bytes)) as img:
+            original_size = img.size
+            rotated = img.getexif().get(0x0112, 1) not in (None, 1)
+
+            # JPEG decoders can scale down while decoding, which is much
+            # cheaper than decoding full size and resampling afterwards
+            img.draft(
+                "L" if VISION_GRAYSCALE else "RGB",
+                (VISION_MAX_DIMENSION, VISION_MAX_DIMENSION)
+            )
+
+            upright = ImageOps.exif_transpose(img)
+            upright_size = upright.size
+
+            upright.thumbnail(
+                (VISION_MAX_DIMENSION, VISION_MAX_DIMENSION),
+                Image.Resampling.LANCZOS
+            )
+            resized = upright.size != upright_size
+
+            converted = upright.convert("L" if VISION_GRAYSCALE else "RGB")
+
+            out = io.BytesIO()
+            converted.save(
+                out,
+                format="JPEG",
+                quality=VISION_JPEG_QUALITY,
+                optimize=True
+            )
+            output_bytes = out.getvalue()
+            output_size = converted.size
+
+    except Exception as e:
+        # Unreadable input (PDFs, unknown formats) and any other Pillow
+        # failure, e.g. DecompressionBombError, fall back to the original
+        stats = {"skipped": f"unreadable image: {e}"}
+        _record(stats)
+        return image_bytes, mime_type, stats
+
+    if len(output_bytes) >= len(image_bytes) and not (rotated or resized):
+        output_bytes = image_bytes
+        output_mime = mime_type
+    else:
+        output_mime = "image/jpeg"
+
+    stats = {
+        "original_bytes": len(image_bytes),
+        "output_bytes": len(output_bytes),
+        "bytes_saved": len(image_bytes) - len(output_bytes),
+        "original_size": list(original_size),
+        "output_size": list(output_size),
+        "elapsed_ms": round((time.perf_counter() - start) * 1000, 1),
+    }
+    _record(stats)
+
+    return output_bytes, output_mime, stats
+
+
+def get_preprocessing_stats():
+    with _totals_lock:
+        totals = dict(_totals)
+
+    totals["bytes_saved"] = totals["bytes_in"] - totals["bytes_out"]
+    totals["avg_ms"] = (
+        round(totals["total_ms"] / totals["images"], 1) if totals["images"] else 0.0
+    )
+    totals["total_ms"] = round(totals["total_ms"], 1)
+    return totals
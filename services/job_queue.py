@@ -0,0 +1,129 @@
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+
+UPLOAD_WORKERS = int(os.getenv("UPLOAD_WORKERS", "4"))
+UPLOAD_QUEUE_DEPTH = int(os.getenv("UPLOAD_QUEUE_DEPTH", "32"))
+JOB_RESULT_TTL = float(os.getenv("JOB_RESULT_TTL", "3600"))
+
+
+class JobQueueFull(Exception):
+    pass
+
+
+class JobFailed(Exception):
+    """Raised by a job to finish as 'failed' with a structured error."""
+
+    def __init__(self, error, message, **details):
+        super().__init__(message)
+        self.error = error
+        self.message = message
+        self.details = details
+
+
+class LocalJobQueue:
+    """
+    In-process job backend: a bounded worker pool in front of a bounded
+    backlog. Job state lives in this process, so status must be polled
+    from the same worker; gunicorn.conf.py refuses to start more than one
+    worker while this is the only backend.
+    """
+
+    def __init__(self, workers: int, max_queue: int, result_ttl: float, name: str = "jobs"):
+        self._executor = ThreadPoolExecutor(
+            max_workers=workers,
+            thread_name_prefix=name
+        )
+        self._slots = threading.BoundedSemaphore(workers + max_queue)
+        self._jobs = {}
+        self._lock = threading.Lock()
+        self.workers = workers
+        self.max_queue = max_queue
+        self.result_ttl = result_ttl
+
+    def submit(self, fn, *args, owner=None, **kwargs) -> str:
+        if not self._slots.acquire(blocking=False):
+            raise JobQueueFull("Job queue is full. Please retry shortly.")
+
+        job_id = str(uuid.uuid4())
+        job = {
+            "job_id": job_id,
+            "owner": owner,
+            "status": "queued",
+            "created_at": datetime.utcnow().isoformat(),
+            "finished_at": None,
+            "result": None,
+            "error": None,
+        }
+
+        with self._lock:
+            self._prune()
+            self._jobs[job_id] = job
+
+        try:
+            self._executor.submit(self._run, job, fn, args, kwargs)
+        except Exception:
+            self._slots.release()
+            with self._lock:
+                self._jobs.pop(job_id, None)
+            raise
+
+        return job_id
+
+    def _run(self, job, fn, args, kwargs):
+        job["status"] = "running"
+        try:
+            job["result"] = fn(*args, **kwargs)
+            job["status"] = "done"
+        except JobFailed as e:
+            job["error"] = {"error": e.error, "message": e.message, **e.details}
+            job["status"] = "failed"
+        except Exception as e:
+            print(f"JOB {job['job_id']} ERROR:", e)
+            job["error"] = {"error": "INTERNAL_ERROR", "message": str(e)}
+            job["status"] = "failed"
+        finally:
+            job["finished_at"] = datetime.utcnow().isoformat()
+            job["_finished"] = time.monotonic()
+            self._slots.release()
+
+    def _prune(self):
+        cutoff = time.monotonic() - self.result_ttl
+        expired = [
+            job_id for job_id, job in self._jobs.items()
+            if job.get("_finished") and job["_finished"] < cutoff
+        ]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+    def get(self, job_id: str, owner=None):
+        """The job, or None if it does not exist or belongs to someone else."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if not job or job["owner"] != owner:
+                return None
+            return {k: v for k, v in job.items() if not k.startswith("_")}
+
+    def stats(self):
+        with self._lock:
+            counts = {"queued": 0, "running": 0, "done": 0, "failed": 0}
+            for job in self._jobs.values():
+                counts[job["status"]] += 1
+
+        return {
+            "workers": self.workers,
+            "max_queue": self.max_queue,
+            **counts
+        }
+
+
+upload_queue = LocalJobQueue(
+    workers=UPLOAD_WORKERS,
+    max_queue=UPLOAD_QUEUE_DEPTH,
+    result_ttl=JOB_RESULT_TTL,
+    name="upload-worker"
+)
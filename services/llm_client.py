@@ -0,0 +1,401 @@
+import os
+import random
+import re
+import threading
+import time
+from datetime import datetime
+
+from services.quota_governor import governor, estimate_tokens, actual_tokens, QuotaExceeded
+
+
+DEFAULT_MODEL = "gemini-2.5-flash"
+
+# Per-attempt HTTP timeout; retries are done here, not inside the SDK
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "30"))
+LLM_MAX_ATTEMPTS = int(os.getenv("LLM_MAX_ATTEMPTS", "3"))
+LLM_BACKOFF_BASE = float(os.getenv("LLM_BACKOFF_BASE", "0.5"))
+LLM_BACKOFF_MAX = float(os.getenv("LLM_BACKOFF_MAX", "8"))
+LLM_BREAKER_THRESHOLD = int(os.getenv("LLM_BREAKER_THRESHOLD", "5"))
+LLM_BREAKER_COOLDOWN = float(os.getenv("LLM_BREAKER_COOLDOWN", "30"))
+
+RETRYABLE_STATUS_CODES = {500, 502, 503, 504}
+RETRYABLE_STATUSES = ("UNAVAILABLE", "DEADLINE_EXCEEDED", "INTERNAL")
+
+ERROR_MESSAGES = {
+    "QUOTA_EXHAUSTED": "Gemini API quota exhausted. Please retry after some time.",
+    "GEMINI_ERROR": "Gemini failed to process the request.",
+    "INVALID_AI_RESPONSE": "Gemini returned invalid JSON.",
+}
+
+# Client configurations the services use, created up front by warm_up_clients()
+WARM_PROFILES = [
+    {"temperature": 0},                            # scoring, unit conversion
+    {"temperature": 0.3},                          # explanations
+    {"temperature": 0, "top_p": 1.0, "top_k": 1},  # vision extraction
+]
+
+_clients = {}
+_stats = {}
+_registry_lock = threading.Lock()
+
+
+class ClientStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.created_at = datetime.utcnow().isoformat()
+        self.reuses = 0
+        self.invocations = 0
+        self.errors = 0
+        self.retries = 0
+        self.total_latency = 0.0
+        self.max_latency = 0.0
+        self.last_latency = 0.0
+
+    def record_reuse(self):
+        with self._lock:
+            self.reuses += 1
+
+    def record_retry(self):
+        with self._lock:
+            self.retries += 1
+
+    def record_error(self):
+        with self._lock:
+            self.errors += 1
+
+    def record_call(self, latency, failed=False):
+        with self._lock:
+            self.invocations += 1
+            self.total_latency += latency
+            self.last_latency = latency
+            self.max_latency = max(self.max_latency, latency)
+            if failed:
+                self.errors += 1
+
+    def to_dict(self):
+        with self._lock:
+            avg = self.total_latency / self.invocations if self.invocations else 0.0
+            return {
+                "created_at": self.created_at,
+                "reuses": self.reuses,
+                "invocations": self.invocations,
+                "errors": self.errors,
+                "retries": self.retries,
+                "avg_latency_ms": round(avg * 1000, 1),
+                "max_latency_ms": round(self.max_latency * 1000, 1),
+                "last_latency_ms": round(self.last_latency * 1000, 1),
+            }
+
+
+class LLMInvocationError(Exception):
+    """
+    A failed Gemini call, with a stable error code for the API response:
+    QUOTA_EXHAUSTED, GEMINI_ERROR or INVALID_AI_RESPONSE.
+    """
+
+    def __init__(self, code, message=None, retry_after=None):
+        super().__init__(message or ERROR_MESSAGES.get(code, code))
+        self.code = code
+        self.message = message or ERROR_MESSAGES.get(code, code)
+        self.retry_after = retry_after
+
+    def to_response(self):
+        response = {
+            "success": False,
+            "error": self.code,
+            "message": self.message,
+        }
+        if self.retry_after is not None:
+            response["retry_after"] = self.retry_after
+        return response
+
+
+class CircuitBreaker:
+    """
+    Opens after `threshold` consecutive availability failures and rejects
+    calls for `cooldown` seconds. Then one trial call is let through:
+    success closes the breaker, failure opens it again.
+    """
+
+    def __init__(self, threshold: int, cooldown: float):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self._lock = threading.Lock()
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self.rejected = 0
+        self.trips = 0
+
+    def before_call(self):
+        with self._lock:
+            if self.state == "closed":
+                return
+
+            remaining = self.opened_at + self.cooldown - time.monotonic()
+            if self.state == "open" and remaining <= 0:
+                self.state = "half_open"
+                return
+
+            self.rejected += 1
+            raise LLMInvocationError(
+                "GEMINI_ERROR",
+                "Gemini is temporarily unavailable. Please retry shortly.",
+                retry_after=max(remaining, 1.0)
+            )
+
+    def record_success(self):
+        with self._lock:
+            self.state = "closed"
+            self.failures = 0
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == "half_open" or self.failures >= self.threshold:
+                if self.state != "open":
+                    self.trips += 1
+                self.state = "open"
+                self.opened_at = time.monotonic()
+
+    def release(self):
+        """Ends a half-open trial that failed for reasons unrelated to availability."""
+        with self._lock:
+            if self.state == "half_open":
+                self.state = "closed"
+
+    def cancel_trial(self):
+        """
+        Gives back a half-open trial that never reached Gemini (e.g. the
+        quota governor refused it). Keeps the original opened_at, so the
+        next call may take the trial instead.
+        """
+        with self._lock:
+            if self.state == "half_open":
+                self.state = "open"
+
+    def stats(self):
+        with self._lock:
+            return {
+                "state": self.state,
+                "consecutive_failures": self.failures,
+                "trips": self.trips,
+                "rejected": self.rejected,
+            }
+
+
+breaker = CircuitBreaker(LLM_BREAKER_THRESHOLD, LLM_BREAKER_COOLDOWN)
+
+
+def _status_code(error):
+    for err in (error, error.__cause__):
+        code = getattr(err, "code", None)
+        if isinstance(code, int):
+            return code
+    return None
+
+
+def _retry_delay(error):
+    """Server-suggested delay from a 429's RetryInfo, in seconds."""
+    match = re.search(r"retryDelay['\"]?:\s*['\"](\d+(?:\.\d+)?)s", str(error))
+    return float(match.group(1)) if match else None
+
+
+def classify_error(error):
+    """
+    Maps an exception from a Gemini call to (LLMInvocationError, retryable).
+    Returns (None, False) for errors that are not Gemini failures.
+    """
+    import httpx
+    from google.genai import errors as genai_errors
+    from langchain_google_genai.chat_models import ChatGoogleGenerativeAIError
+
+    if isinstance(error, LLMInvocationError):
+        return error, False
+
+    if isinstance(error, QuotaExceeded):
+        return LLMInvocationError("QUOTA_EXHAUSTED", retry_after=error.retry_after), False
+
+    text = str(error)
+    code = _status_code(error)
+
+    if isinstance(error, (ChatGoogleGenerativeAIError, genai_errors.APIError)):
+        if code == 429 or "RESOURCE_EXHAUSTED" in text:
+            return LLMInvocationError("QUOTA_EXHAUSTED", retry_after=_retry_delay(error)), False
+
+        retryable = code in RETRYABLE_STATUS_CODES or any(s in text for s in RETRYABLE_STATUSES)
+        return LLMInvocationError("GEMINI_ERROR"), retryable
+
+    if isinstance(error, (httpx.TimeoutException, httpx.TransportError, TimeoutError, ConnectionError)):
+        return LLMInvocationError("GEMINI_ERROR", "Gemini did not respond in time."), True
+
+    return None, False
+
+
+def _backoff(attempt):
+    """Full-jitter exponential backoff before retry number `attempt` (1-based)."""
+    return random.uniform(0, min(LLM_BACKOFF_MAX, LLM_BACKOFF_BASE * 2 ** (attempt - 1)))
+
+
+def _client_key(model, temperature, params):
+    return (model, temperature, tuple(sorted(params.items())))
+
+
+def get_llm(model: str = DEFAULT_MODEL, temperature: float = 0, **params):
+    """
+    Returns the process-wide ChatGoogleGenerativeAI for this configuration,
+    creating it on first use. Clients keep their HTTP connection pool
+    between calls, so reusing them skips client setup and TLS handshakes.
+    """
+    key = _client_key(model, temperature, params)
+
+    client = _clients.get(key)
+    if client is not None:
+        _stats[key].record_reuse()
+        return client
+
+    with _registry_lock:
+        client = _clients.get(key)
+        if client is None:
+            # langchain_google_genai takes seconds to import; defer it to the first client
+            from langchain_google_genai import ChatGoogleGenerativeAI
+
+            client = ChatGoogleGenerativeAI(
+                model=model,
+                temperature=temperature,
+                google_api_key=os.getenv("GEMINI_API_KEY"),
+                **{"timeout": LLM_TIMEOUT, "max_retries": 0, **params}
+            )
+            _stats[key] = ClientStats()
+            _clients[key] = client
+        else:
+            _stats[key].record_reuse()
+
+    return client
+
+
+def _call_with_retries(call, messages, stats):
+    """
+    Runs call() under the circuit breaker and quota governor, retrying
+    retryable failures with jittered exponential backoff. Gemini failures
+    are raised as LLMInvocationError; anything else is re-raised as is.
+    """
+    estimated = estimate_tokens(messages)
+    attempt = 0
+
+    while True:
+        attempt += 1
+
+        try:
+            breaker.before_call()
+            reservation = governor.admit(estimated)
+        except QuotaExceeded as e:
+            breaker.cancel_trial()
+            raise classify_error(e)[0] from e
+
+        start = time.perf_counter()
+        try:
+            result = call(reservation)
+        except Exception as e:
+            stats.record_call(time.perf_counter() - start, failed=True)
+            error, retryable = classify_error(e)
+
+            if retryable:
+                breaker.record_failure()
+            else:
+                breaker.release()
+
+            if error is None:
+                raise
+
+            if retryable and attempt < LLM_MAX_ATTEMPTS:
+                stats.record_retry()
+                delay = _backoff(attempt)
+                print(f"LLM RETRY {attempt}/{LLM_MAX_ATTEMPTS - 1} in {delay:.2f}s:", str(e).splitlines()[0])
+                time.sleep(delay)
+                continue
+
+            raise error from e
+
+        stats.record_call(time.perf_counter() - start)
+        breaker.record_success()
+        return result
+
+
+def invoke_llm(messages, model: str = DEFAULT_MODEL, temperature: float = 0, **params):
+    """
+    Invokes the pooled client for this configuration. Each attempt is
+    admitted by the quota governor and the circuit breaker; transient
+    failures (5xx, UNAVAILABLE, timeouts) are retried with backoff.
+    Failures are raised as LLMInvocationError.
+    """
+    llm = get_llm(model, temperature, **params)
+    stats = _stats[_client_key(model, temperature, params)]
+
+    def call(reservation):
+        response = llm.invoke(messages)
+        reservation.settle(actual_tokens(response))
+        return response
+
+    return _call_with_retries(call, messages, stats)
+
+
+def stream_llm(messages, model: str = DEFAULT_MODEL, temperature: float = 0, **params):
+    """
+    Streaming counterpart of invoke_llm. Yields message chunks as the
+    model produces them. Connecting is retried like invoke_llm; once the
+    first chunk is out, a failure ends the stream with LLMInvocationError.
+    """
+    llm = get_llm(model, temperature, **params)
+    stats = _stats[_client_key(model, temperature, params)]
+
+    def call(reservation):
+        stream = iter(llm.stream(messages))
+        return reservation, stream, next(stream, None)
+
+    reservation, stream, first = _call_with_retries(call, messages, stats)
+    if first is None:
+        return
+
+    used = actual_tokens(first)
+    try:
+        yield first
+        for chunk in stream:
+            tokens = actual_tokens(chunk)
+            if tokens is not None:
+                used = (used or 0) + tokens
+            yield chunk
+    except Exception as e:
+        stats.record_error()
+        error, retryable = classify_error(e)
+        if retryable:
+            breaker.record_failure()
+        if error is None:
+            raise
+        raise error from e
+
+    reservation.settle(used)
+
+
+def warm_up_clients():
+    for profile in WARM_PROFILES:
+        try:
+            get_llm(**profile)
+        except Exception as e:
+            print(f"LLM warm-up skipped for {profile}: {str(e).splitlines()[0]}")
+
+
+def get_breaker_stats():
+    return breaker.stats()
+
+
+def get_client_stats():
+    return [
+        {
+            "model": key[0],
+            "temperature": key[1],
+            "params": dict(key[2]),
+            **stats.to_dict()
+        }
+        for key, stats in list(_stats.items())
+    ]
@@ -0,0 +1,194 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+from abc import ABC, abstractmethod
+
+from database.storage import upload_file, download_file, delete_file, list_files
+
+
+PDF_CACHE_BACKEND = os.getenv("PDF_CACHE_BACKEND", "disk").lower()
+PDF_CACHE_DIR = os.getenv(
+    "PDF_CACHE_DIR",
+    os.path.join(os.path.dirname(__file__), "..", ".cache", "pdfs")
+)
+PDF_CACHE_BUCKET = os.getenv("PDF_CACHE_BUCKET", "report-pdfs")
+
+
+def pdf_fingerprint(report, template_version) -> str:
+    """
+    Hash of everything the rendered PDF depends on: the analysis, the
+    confirmed test data, the report date and the template version.
+    """
+    payload = json.dumps(
+        [
+            template_version,
+            report.get("created_at"),
+            report.get("analysis_data"),
+            report.get("confirmed_data"),
+        ],
+        sort_keys=True,
+        separators=(",", ":"),
+        default=str
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:32]
+
+
+class PDFStore(ABC):
+    """
+    Byte store behind PDFCache. Keys are "<report_id>/<fingerprint>";
+    put() may drop older renders of the same report.
+    """
+
+    @abstractmethod
+    def get(self, key):
+        ...
+
+    @abstractmethod
+    def put(self, key, data: bytes):
+        ...
+
+
+class DiskPDFStore(PDFStore):
+    """PDFs on local disk, one directory per report."""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+
+    def _path(self, key):
+        report_id, fingerprint = key.split("/", 1)
+        return os.path.join(self.directory, str(report_id), f"{fingerprint}.pdf")
+
+    def get(self, key):
+        try:
+            with open(self._path(key), "rb") as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def put(self, key, data: bytes):
+        path = self._path(key)
+        report_dir = os.path.dirname(path)
+        os.makedirs(report_dir, exist_ok=True)
+
+        fd, tmp_path = tempfile.mkstemp(dir=report_dir, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+        # Older renders of this report can never be requested again
+        for name in os.listdir(report_dir):
+            if name.endswith(".pdf") and name != os.path.basename(path):
+                try:
+                    os.remove(os.path.join(report_dir, name))
+                except OSError:
+                    pass
+
+    def clear(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+
+class StoragePDFStore(PDFStore):
+    """PDFs in a Supabase Storage bucket, shared by every instance."""
+
+    def __init__(self, bucket: str):
+        self.bucket = bucket
+
+    def _path(self, key):
+        return f"{key}.pdf"
+
+    def get(self, key):
+        return download_file(self.bucket, self._path(key))
+
+    def put(self, key, data: bytes):
+        # Paths are content-addressed, so a failed duplicate upload is harmless
+        upload_file(self.bucket, self._path(key), data, "application/pdf")
+
+        # Older renders of this report can never be requested again. They
+        # are found by listing the report's folder, since another worker
+        # may have written them
+        report_id, fingerprint = key.split("/", 1)
+        for name in list_files(self.bucket, report_id):
+            if name.endswith(".pdf") and name != f"{fingerprint}.pdf":
+                delete_file(self.bucket, f"{report_id}/{name}")
+
+
+class NullPDFStore(PDFStore):
+    """Disables caching while keeping the metrics."""
+
+    def get(self, key):
+        return None
+
+    def put(self, key, data: bytes):
+        pass
+
+
+class PDFCache:
+    def __init__(self, store: PDFStore):
+        self.store = store
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.not_modified = 0
+
+    @staticmethod
+    def make_key(report, template_version):
+        return f"{report['id']}/{pdf_fingerprint(report, template_version)}"
+
+    @staticmethod
+    def etag(key):
+        return key.split("/", 1)[1]
+
+    def get(self, key):
+        try:
+            data = self.store.get(key)
+        except Exception as e:
+            print(f"PDF cache read failed: {e}")
+            data = None
+
+        with self._lock:
+            if data is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return data
+
+    def put(self, key, data: bytes):
+        try:
+            self.store.put(key, data)
+        except Exception as e:
+            print(f"PDF cache write failed: {e}")
+            return
+
+        with self._lock:
+            self.stores += 1
+
+    def record_not_modified(self):
+        with self._lock:
+            self.not_modified += 1
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "backend": type(self.store).__name__,
+                "hits": self.hits,
+                "misses": self.misses,
+                "stores": self.stores,
+                "not_modified": self.not_modified,
+                "hit_ratio": round(self.hits / lookups, 3) if lookups else 0.0,
+            }
+
+
+def _make_store():
+    if PDF_CACHE_BACKEND == "none":
+        return NullPDFStore()
+    if PDF_CACHE_BACKEND == "storage":
+        return StoragePDFStore(PDF_CACHE_BUCKET)
+    return DiskPDFStore(PDF_CACHE_DIR)
+
+
+pdf_cache = PDFCache(_make_store())
@@ -0,0 +1,124 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from services.pdf_cache import pdf_cache
+from utils.concurrency import log_failures
+from utils.constants import PDF_TEMPLATE_VERSION
+
+
+PDF_RENDER_WORKERS = int(os.getenv("PDF_RENDER_WORKERS", "2"))
+# How long a download waits on an in-flight render before giving up
+PDF_RENDER_TIMEOUT = float(os.getenv("PDF_RENDER_TIMEOUT", "60"))
+
+
+class PDFRenderQueue:
+    """
+    Background PDF rendering into pdf_cache. Renders are keyed like the
+    cache, so a download that arrives while its report is still being
+    rendered waits on that render instead of starting another.
+    """
+
+    def __init__(self, workers: int):
+        self._executor = ThreadPoolExecutor(
+            max_workers=workers,
+            thread_name_prefix="pdf-render"
+        )
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self.workers = workers
+        self.submitted = 0
+        self.deduplicated = 0
+        self.rendered = 0
+        self.failed = 0
+        self.total_render_time = 0.0
+
+    def submit(self, report):
+        """Returns a future for the report's PDF bytes, sharing any in-flight render."""
+        key = pdf_cache.make_key(report, PDF_TEMPLATE_VERSION)
+
+        with self._lock:
+            future = self._inflight.get(key)
+            if future is not None:
+                self.deduplicated += 1
+                return future
+
+            future = self._executor.submit(self._render, key, report)
+            self._inflight[key] = future
+            self.submitted += 1
+
+        future.add_done_callback(lambda _: self._finish(key))
+        return future
+
+    def _finish(self, key):
+        with self._lock:
+            self._inflight.pop(key, None)
+
+    def _render(self, key, report):
+        cached = pdf_cache.get(key)
+        if cached is not None:
+            return cached
+
+        # ReportLab is only loaded once something actually needs rendering
+        from services.pdf_services import generate_report_pdf
+
+        start = time.perf_counter()
+        try:
+            pdf_bytes = generate_report_pdf(
+                report,
+                report.get("analysis_data") or {}
+            ).getvalue()
+        except Exception:
+            with self._lock:
+                self.failed += 1
+            raise
+
+        pdf_cache.put(key, pdf_bytes)
+
+        with self._lock:
+            self.rendered += 1
+            self.total_render_time += time.perf_counter() - start
+
+        return pdf_bytes
+
+    def get_pdf(self, report, timeout=PDF_RENDER_TIMEOUT) -> bytes:
+        """Cached PDF bytes, or the result of the (possibly in-flight) render."""
+        key = pdf_cache.make_key(report, PDF_TEMPLATE_VERSION)
+
+        with self._lock:
+            future = self._inflight.get(key)
+            if future is not None:
+                self.deduplicated += 1
+
+        if future is None:
+            cached = pdf_cache.get(key)
+            if cached is not None:
+                return cached
+            future = self.submit(report)
+
+        return future.result(timeout=timeout)
+
+    def stats(self):
+        with self._lock:
+            avg = self.total_render_time / self.rendered if self.rendered else 0.0
+            return {
+                "workers": self.workers,
+                "in_flight": len(self._inflight),
+                "submitted": self.submitted,
+                "deduplicated": self.deduplicated,
+                "rendered": self.rendered,
+                "failed": self.failed,
+                "avg_render_ms": round(avg * 1000, 1),
+            }
+
+
+pdf_render_queue = PDFRenderQueue(PDF_RENDER_WORKERS)
+
+
+def prerender_pdf_async(report):
+    """Queues the PDF of a freshly analyzed report; failures are only logged."""
+    if not report or report.get("status") != "analyzed":
+        return None
+
+    return log_failures(pdf_render_queue.submit(report), "PDF PRERENDER")
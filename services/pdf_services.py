@@ -1,13 +1,20 @@
 import io
 import os
+import threading
 from datetime import datetime
 import math
 
-import matplotlib.pyplot as plt
-
+from reportlab.graphics.charts.barcharts import VerticalBarChart
+from reportlab.graphics.shapes import Drawing, Group, String
 from reportlab.lib.pagesizes import letter
 from reportlab.lib import colors
 from reportlab.platypus import (
+    BaseDocTemplate,
+    Flowable,
+    Frame,
+    NextPageTemplate,
+    PageBreak,
+    PageTemplate,
     SimpleDocTemplate,
     Paragraph,
     Spacer,
@@ -15,8 +22,107 @@ from reportlab.platypus import (
     TableStyle,
     Image
 )
-from reportlab.lib.styles import getSampleStyleSheet
-from matplotlib.ticker import FuncFormatter
+from reportlab.platypus.tableofcontents import TableOfContents
+from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+from reportlab.lib.utils import ImageReader
+
+from utils.constants import PDF_CHART_BACKEND
+
+
+LOGO_PATH = os.path.join(os.path.dirname(__file__), "..", "assets", "logo.jpeg")
+
+BORDER_COLOR = colors.HexColor("#6b7280")
+
+# Page geometry shared by single reports and merged exports
+PAGE_MARGINS = {
+    "leftMargin": 55,
+    "rightMargin": 55,
+    "topMargin": 140,
+    "bottomMargin": 65,
+}
+
+
+class PDFTemplate:
+    """
+    The parts of the report layout that do not depend on the report:
+    paragraph styles, the results TableStyle and the decoded logo.
+    Built once per process (see get_pdf_template()) and only read by
+    renders afterwards, so threads can share one instance.
+    """
+
+    def __init__(self, logo_path=LOGO_PATH):
+        styles = getSampleStyleSheet()
+        styles["Heading2"].textColor = colors.HexColor("#1f2937")
+        styles["Heading2"].spaceBefore = 14
+        styles["Heading2"].spaceAfter = 6
+        styles["BodyText"].leading = 14
+        self.styles = styles
+
+        self.toc_style = ParagraphStyle(
+            "TOCEntry",
+            parent=styles["BodyText"],
+            fontSize=11,
+            leading=18,
+            leftIndent=10,
+        )
+
+        self.table_style = TableStyle([
+            ("BACKGROUND", (0, 0), (-1, 0), colors.HexColor("#2563eb")),  
+            ("TEXTCOLOR", (0, 0), (-1, 0), colors.white),
+            ("FONT", (0, 0), (-1, 0), "Helvetica-Bold"),
+            ("BOTTOMPADDING", (0, 0), (-1, 0), 10),
+
+            ("BACKGROUND", (0, 1), (-1, -1), colors.whitesmoke),
+            ("ROWBACKGROUNDS", (0, 1), (-1, -1), [
+                colors.HexColor("#f8fafc"),
+                colors.HexColor("#eef2ff"),
+            ]),
+
+            ("GRID", (0, 0), (-1, -1), 0.75, colors.HexColor("#9ca3af")),
+
+            ("ALIGN", (1, 1), (-1, -1), "CENTER"),
+            ("VALIGN", (0, 0), (-1, -1), "MIDDLE"),
+        ])
+
+        self.logo = self._load_logo(logo_path)
+
+    @staticmethod
+    def _load_logo(path):
+        if not os.path.exists(path):
+            return None
+
+        with open(path, "rb") as f:
+            return _LogoReader(f.read())
+
+
+class _LogoReader(ImageReader):
+    """
+    ImageReader over in-memory JPEG bytes. Pixels are decoded once up
+    front, and every canvas gets its own handle on the bytes, so the
+    JPEG is embedded as-is without threads sharing a file position.
+    """
+
+    def __init__(self, jpeg_bytes):
+        self._jpeg = jpeg_bytes
+        super().__init__(io.BytesIO(jpeg_bytes))
+        self.getRGBData()
+
+    def jpeg_fh(self):
+        return io.BytesIO(self._jpeg)
+
+
+_template = None
+_template_lock = threading.Lock()
+
+
+def get_pdf_template():
+    global _template
+
+    if _template is None:
+        with _template_lock:
+            if _template is None:
+                _template = PDFTemplate()
+    return _template
 
 
 def format_date_human(date_val):
@@ -44,7 +150,13 @@ def normalize_explanation(explanation):
     return ""
 
 
-def generate_biomarker_chart(tests):
+CHART_WIDTH = 460
+CHART_HEIGHT = 300
+CHART_BAR_COLOR = "#60a5fa"
+CHART_TITLE = "Smart Health Visualization"
+
+
+def _chart_series(tests):
     labels, values = [], []
 
     for t in tests:
@@ -57,18 +169,88 @@ def generate_biomarker_chart(tests):
         except:
             continue
 
-    if not values:
-        return None
+    return labels, values
 
+
+def _use_log_scale(values):
     max_val = max(values)
     min_val = min(values)
+    return min_val > 0 and (max_val / min_val) > 20
 
-    
-    use_log = min_val > 0 and (max_val / min_val) > 20
 
-    fig, ax = plt.subplots(figsize=(7, 4))
+def _decade_label(exponent):
+    if exponent >= 0:
+        return str(10 ** exponent)
+    return f"{10 ** exponent:.{-exponent}f}"
+
+
+def _reportlab_chart(labels, values, use_log):
+    """Vector bar chart drawn with reportlab.graphics; no rasterization."""
+    drawing = Drawing(CHART_WIDTH, CHART_HEIGHT)
+
+    chart = VerticalBarChart()
+    chart.x = 60
+    chart.y = 95
+    chart.width = CHART_WIDTH - 80
+    chart.height = CHART_HEIGHT - 130
+
+    if use_log:
+        # Bars are drawn on log10 values; ticks sit on whole decades
+        # and are labelled with the plain value, like the matplotlib chart.
+        # The axis starts a decade below the smallest value so no bar is
+        # empty. ReportLab grows bars from 0 when the axis spans it, so the
+        # values are shifted to start at 0 and the labels shifted back.
+        floor = math.ceil(math.log10(min(values))) - 1
+        chart.data = [[math.log10(v) - floor for v in values]]
+        chart.valueAxis.valueMin = 0
+        chart.valueAxis.valueMax = math.ceil(math.log10(max(values))) - floor
+        chart.valueAxis.valueStep = 1
+        chart.valueAxis.labelTextFormat = lambda v: _decade_label(round(v) + floor)
+        y_label = "Value (scaled for readability)"
+    else:
+        chart.data = [values]
+        chart.valueAxis.valueMin = 0
+        y_label = "Value"
+
+    chart.bars[0].fillColor = colors.HexColor(CHART_BAR_COLOR)
+    chart.bars[0].strokeColor = None
+    chart.barSpacing = 2
+    chart.groupSpacing = 8
+
+    chart.valueAxis.visibleGrid = True
+    chart.valueAxis.gridStrokeColor = colors.HexColor("#d1d5db")
+    chart.valueAxis.gridStrokeDashArray = (2, 2)
+    chart.valueAxis.labels.fontSize = 8
+
+    chart.categoryAxis.categoryNames = labels
+    chart.categoryAxis.labels.angle = 40
+    chart.categoryAxis.labels.boxAnchor = "ne"
+    chart.categoryAxis.labels.dx = 4
+    chart.categoryAxis.labels.dy = -4
+    chart.categoryAxis.labels.fontSize = 8
+
+    drawing.add(chart)
+    drawing.add(String(
+        CHART_WIDTH / 2, CHART_HEIGHT - 18, CHART_TITLE,
+        fontName="Helvetica-Bold", fontSize=11, textAnchor="middle"
+    ))
+
+    y_axis_label = String(0, 0, y_label, fontName="Helvetica", fontSize=9, textAnchor="middle")
+    drawing.add(Group(y_axis_label, transform=(0, 1, -1, 0, 14, chart.y + chart.height / 2)))
 
-    ax.bar(labels, values, color="#60a5fa")
+    return drawing
+
+
+def _matplotlib_chart(labels, values, use_log):
+    """150-dpi PNG rendered with matplotlib (optional dependency)."""
+    from matplotlib.figure import Figure
+    from matplotlib.ticker import FuncFormatter
+
+    # Figure instead of pyplot: no global state, so renders can run in threads
+    fig = Figure(figsize=(7, 4))
+    ax = fig.subplots()
+
+    ax.bar(labels, values, color=CHART_BAR_COLOR)
 
     if use_log:
         ax.set_yscale("log")
@@ -81,31 +263,48 @@ def generate_biomarker_chart(tests):
     else:
         ax.set_ylabel("Value")
 
-    ax.set_title("Smart Health Visualization")
+    ax.set_title(CHART_TITLE)
     ax.tick_params(axis="x", rotation=40, labelsize=9)
     ax.grid(axis="y", linestyle="--", alpha=0.4)
 
-    plt.tight_layout()
+    fig.tight_layout()
 
     buf = io.BytesIO()
-    plt.savefig(buf, format="png", dpi=150)
-    plt.close(fig)
+    fig.savefig(buf, format="png", dpi=150)
     buf.seek(0)
 
-    return buf
+    return Image(buf, width=CHART_WIDTH, height=CHART_HEIGHT)
+
+
+CHART_BACKENDS = {
+    "reportlab": _reportlab_chart,
+    "matplotlib": _matplotlib_chart,
+}
 
 
-def draw_common_header(canvas, doc, report_data):
+def generate_biomarker_chart(tests, backend=None):
+    """
+    Bar chart flowable of the positive test values (None if there are
+    none). Values spanning more than 20x switch to a log scale.
+    """
+    labels, values = _chart_series(tests)
+    if not values:
+        return None
+
+    render = CHART_BACKENDS[(backend or PDF_CHART_BACKEND).lower()]
+    return render(labels, values, _use_log_scale(values))
+
+
+def draw_common_header(canvas, doc, date_str, template):
     width, height = letter
 
-    canvas.setStrokeColor(colors.HexColor("#6b7280"))
+    canvas.setStrokeColor(BORDER_COLOR)
     canvas.setLineWidth(1.6)
     canvas.rect(25, 25, width - 50, height - 50)
 
-    logo_path = "assets/logo.jpeg"
-    if os.path.exists(logo_path):
+    if template.logo is not None:
         canvas.drawImage(
-            logo_path,
+            template.logo,
             40,
             height - 70,
             width=100,
@@ -114,7 +313,6 @@ def draw_common_header(canvas, doc, report_data):
             mask="auto"
         )
 
-    date_str = format_date_human(report_data.get("created_at"))
     canvas.setFont("Helvetica", 10)
     canvas.setFillColor(colors.grey)
     canvas.drawRightString(
@@ -173,32 +371,19 @@ def draw_carescore(canvas, analysis_result):
     canvas.drawCentredString(cx, cy - r - 14, "CareScore")
 
 
-def draw_first_page(canvas, doc, report_data, analysis_result):
-    draw_common_header(canvas, doc, report_data)
+def draw_first_page(canvas, doc, date_str, template, analysis_result):
+    draw_common_header(canvas, doc, date_str, template)
     draw_carescore(canvas, analysis_result)
 
 
-def draw_later_pages(canvas, doc, report_data):
-    draw_common_header(canvas, doc, report_data)
+def draw_later_pages(canvas, doc, date_str, template):
+    draw_common_header(canvas, doc, date_str, template)
 
 
-def generate_report_pdf(report_data, analysis_result):
-    buffer = io.BytesIO()
-
-    doc = SimpleDocTemplate(
-        buffer,
-        pagesize=letter,
-        leftMargin=55,
-        rightMargin=55,
-        topMargin=140,   
-        bottomMargin=65
-    )
-
-    styles = getSampleStyleSheet()
-    styles["Heading2"].textColor = colors.HexColor("#1f2937")
-    styles["Heading2"].spaceBefore = 14
-    styles["Heading2"].spaceAfter = 6
-    styles["BodyText"].leading = 14
+def build_report_story(report_data, analysis_result, chart_backend=None, template=None):
+    """Flowables for one report's body; the header and CareScore are page callbacks."""
+    template = template or get_pdf_template()
+    styles = template.styles
 
     story = []
 
@@ -210,8 +395,11 @@ def generate_report_pdf(report_data, analysis_result):
                 styles["Heading2"]
             )
         )
-        explanation = explanation.replace("\n\n", "<br/><br/>").replace("\n", "<br/>")
-        story.append(Paragraph(explanation, styles["BodyText"]))
+        # One Paragraph per block: splitting a single huge Paragraph across
+        # pages re-wraps the remainder every time, which is quadratic
+        for block in explanation.split("\n\n"):
+            if block.strip():
+                story.append(Paragraph(block.strip().replace("\n", "<br/>"), styles["BodyText"]))
         story.append(Spacer(1, 16))
 
     deviations = analysis_result.get("deviations") or []
@@ -244,29 +432,13 @@ def generate_report_pdf(report_data, analysis_result):
 
         table = Table(table_data, colWidths=[160, 80, 80, 140])
 
-        table.setStyle(TableStyle([
-            ("BACKGROUND", (0, 0), (-1, 0), colors.HexColor("#2563eb")),  
-            ("TEXTCOLOR", (0, 0), (-1, 0), colors.white),
-            ("FONT", (0, 0), (-1, 0), "Helvetica-Bold"),
-            ("BOTTOMPADDING", (0, 0), (-1, 0), 10),
-
-            ("BACKGROUND", (0, 1), (-1, -1), colors.whitesmoke),
-            ("ROWBACKGROUNDS", (0, 1), (-1, -1), [
-                colors.HexColor("#f8fafc"),
-                colors.HexColor("#eef2ff"),
-            ]),
-
-            ("GRID", (0, 0), (-1, -1), 0.75, colors.HexColor("#9ca3af")),
-
-            ("ALIGN", (1, 1), (-1, -1), "CENTER"),
-            ("VALIGN", (0, 0), (-1, -1), "MIDDLE"),
-        ]))
+        table.setStyle(template.table_style)
 
 
         story.append(table)
         story.append(Spacer(1, 20))
 
-    chart = generate_biomarker_chart(tests)
+    chart = generate_biomarker_chart(tests, chart_backend)
     if chart:
         story.append(
             Paragraph(
@@ -274,7 +446,7 @@ def generate_report_pdf(report_data, analysis_result):
                 styles["Heading2"]
             )
         )
-        story.append(Image(chart, width=460, height=300))
+        story.append(chart)
         story.append(Spacer(1, 20))
 
     story.append(Spacer(1, 24))
@@ -285,11 +457,112 @@ def generate_report_pdf(report_data, analysis_result):
         )
     )
 
+    return story
+
+
+def generate_report_pdf(report_data, analysis_result, chart_backend=None, template=None):
+    """
+    Renders the report PDF into a BytesIO. Styles, table style and logo
+    come from the shared PDFTemplate; only the report data is laid out.
+    """
+    template = template or get_pdf_template()
+    date_str = format_date_human(report_data.get("created_at"))
+
+    buffer = io.BytesIO()
+
+    doc = SimpleDocTemplate(buffer, pagesize=letter, **PAGE_MARGINS)
+
+    story = build_report_story(report_data, analysis_result, chart_backend, template)
+
     doc.build(
         story,
-        onFirstPage=lambda c, d: draw_first_page(c, d, report_data, analysis_result),
-        onLaterPages=lambda c, d: draw_later_pages(c, d, report_data),
+        onFirstPage=lambda c, d: draw_first_page(c, d, date_str, template, analysis_result),
+        onLaterPages=lambda c, d: draw_later_pages(c, d, date_str, template),
     )
 
     buffer.seek(0)
     return buffer
+
+
+class _ReportAnchor(Flowable):
+    """Zero-size marker at the start of each report in a merged PDF."""
+
+    def __init__(self, title, key):
+        super().__init__()
+        self.title = title
+        self.key = key
+
+    def wrap(self, availWidth, availHeight):
+        return 0, 0
+
+    def draw(self):
+        self.canv.bookmarkPage(self.key)
+        self.canv.addOutlineEntry(self.title, self.key, level=0)
+
+
+class _MergedReportDoc(BaseDocTemplate):
+    def afterFlowable(self, flowable):
+        if isinstance(flowable, _ReportAnchor):
+            self.notify("TOCEntry", (0, flowable.title, self.page, flowable.key))
+
+
+def report_title(report_data):
+    score = (report_data.get("analysis_data") or {}).get("care_score")
+    title = f"Report of {format_date_human(report_data.get('created_at'))}"
+    return f"{title} (CareScore {score})" if score is not None else title
+
+
+def generate_merged_pdf(reports, output, chart_backend=None, template=None):
+    """
+    Writes several analyzed reports into `output` as one PDF: a table of
+    contents first, then every report starting on a new page with its
+    own header and CareScore. ReportLab cannot import finished PDFs, so
+    the reports are laid out again in one document; multiBuild runs the
+    layout until the TOC page numbers settle.
+    """
+    template = template or get_pdf_template()
+    styles = template.styles
+
+    doc = _MergedReportDoc(output, pagesize=letter, **PAGE_MARGINS)
+    frame = Frame(doc.leftMargin, doc.bottomMargin, doc.width, doc.height, id="normal")
+    export_date = format_date_human(datetime.now().isoformat())
+
+    toc = TableOfContents()
+    toc.levelStyles = [template.toc_style]
+
+    page_templates = [
+        PageTemplate(
+            id="index",
+            frames=[frame],
+            onPage=lambda c, d: draw_later_pages(c, d, export_date, template)
+        )
+    ]
+    story = [Paragraph("Your Health Reports", styles["Heading2"]), toc]
+
+    for i, report in enumerate(reports):
+        analysis = report.get("analysis_data") or {}
+        date_str = format_date_human(report.get("created_at"))
+
+        page_templates += [
+            PageTemplate(
+                id=f"first-{i}",
+                frames=[frame],
+                onPage=lambda c, d, s=date_str, a=analysis: draw_first_page(c, d, s, template, a)
+            ),
+            PageTemplate(
+                id=f"later-{i}",
+                frames=[frame],
+                onPage=lambda c, d, s=date_str: draw_later_pages(c, d, s, template)
+            ),
+        ]
+
+        story += [
+            NextPageTemplate(f"first-{i}"),
+            PageBreak(),
+            NextPageTemplate(f"later-{i}"),
+            _ReportAnchor(report_title(report), f"report-{i}"),
+        ]
+        story += build_report_story(report, analysis, chart_backend, template)
+
+    doc.addPageTemplates(page_templates)
+    doc.multiBuild(story)
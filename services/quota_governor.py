@@ -0,0 +1,244 @@
+import contextvars
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+
+GEMINI_QUOTA_ENABLED = os.getenv("GEMINI_QUOTA_ENABLED", "true").lower() in ("1", "true", "yes")
+GEMINI_RPM = float(os.getenv("GEMINI_RPM", "10"))
+GEMINI_TPM = float(os.getenv("GEMINI_TPM", "250000"))
+# Share of the project budget one user may consume within a minute
+GEMINI_USER_SHARE = float(os.getenv("GEMINI_USER_SHARE", "0.5"))
+# Requests that would fit within this many seconds wait; others are rejected
+GEMINI_QUOTA_MAX_WAIT = float(os.getenv("GEMINI_QUOTA_MAX_WAIT", "2"))
+
+ESTIMATED_OUTPUT_TOKENS = 1024
+ESTIMATED_IMAGE_TOKENS = 1032  # four 258-token tiles
+
+_current_user = contextvars.ContextVar("gemini_quota_user", default=None)
+
+
+class QuotaExceeded(Exception):
+    def __init__(self, retry_after: float, scope: str):
+        super().__init__(f"Gemini {scope} quota exhausted; retry after {retry_after:.0f}s")
+        self.retry_after = retry_after
+        self.scope = scope
+
+    @property
+    def retry_after_header(self):
+        return str(max(1, math.ceil(self.retry_after)))
+
+
+@contextmanager
+def user_scope(user_id):
+    """Attributes the Gemini calls made inside the block to user_id."""
+    token = _current_user.set(str(user_id) if user_id is not None else None)
+    try:
+        yield
+    finally:
+        _current_user.reset(token)
+
+
+def current_user():
+    return _current_user.get()
+
+
+class TokenBucket:
+    """Holds up to `capacity` units and refills `capacity` per minute."""
+
+    def __init__(self, capacity: float):
+        self.capacity = capacity
+        self.rate = capacity / 60.0
+        self.level = capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now):
+        if now > self.updated:
+            self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+            self.updated = now
+
+    def wait_time(self, amount, now):
+        self._refill(now)
+        # Oversized requests only need a full bucket, or they could never run
+        amount = min(amount, self.capacity)
+        if self.level >= amount:
+            return 0.0
+        return (amount - self.level) / self.rate
+
+    def take(self, amount):
+        # A negative amount refunds an over-estimate; never beyond capacity
+        self.level = min(self.capacity, self.level - amount)
+
+    def is_full(self, now):
+        self._refill(now)
+        return self.level >= self.capacity
+
+
+class Reservation:
+    def __init__(self, governor, user_id, estimated_tokens):
+        self._governor = governor
+        self.user_id = user_id
+        self.estimated_tokens = estimated_tokens
+
+    def settle(self, actual_tokens):
+        """Corrects the token buckets once the real usage is known."""
+        if actual_tokens is None:
+            return
+        self._governor._adjust(self.user_id, actual_tokens - self.estimated_tokens)
+
+
+class QuotaGovernor:
+    """
+    Admission control in front of every Gemini call. Each call takes one
+    request and its estimated tokens from the project-wide RPM/TPM
+    buckets and from the calling user's fair-share buckets. Calls that
+    would fit shortly wait; the rest fail fast with an accurate
+    retry-after instead of hitting RESOURCE_EXHAUSTED at Gemini.
+    """
+
+    def __init__(self, rpm, tpm, user_share, max_wait, enabled=True):
+        self.enabled = enabled
+        self.rpm = rpm
+        self.tpm = tpm
+        self.user_share = user_share
+        self.max_wait = max_wait
+        self._lock = threading.Lock()
+        self._requests = TokenBucket(rpm)
+        self._tokens = TokenBucket(tpm)
+        self._users = {}
+        self.admitted = 0
+        self.rejected = 0
+        self.waited = 0
+
+    def _user_buckets(self, user_id, now):
+        if user_id is None:
+            return ()
+
+        buckets = self._users.get(user_id)
+        if buckets is None:
+            if len(self._users) > 10000:
+                self._users = {
+                    uid: b for uid, b in self._users.items()
+                    if not (b[0].is_full(now) and b[1].is_full(now))
+                }
+            buckets = (
+                TokenBucket(max(1.0, self.rpm * self.user_share)),
+                TokenBucket(max(1.0, self.tpm * self.user_share)),
+            )
+            self._users[user_id] = buckets
+        return buckets
+
+    def admit(self, estimated_tokens, user_id=None):
+        if user_id is None:
+            user_id = current_user()
+
+        if not self.enabled:
+            return Reservation(self, user_id, estimated_tokens)
+
+        deadline = time.monotonic() + self.max_wait
+        waited = False
+
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                user_requests, user_tokens = self._user_buckets(user_id, now) or (None, None)
+
+                checks = [
+                    ("project requests", self._requests, 1),
+                    ("project tokens", self._tokens, estimated_tokens),
+                ]
+                if user_requests is not None:
+                    checks += [
+                        ("per-user requests", user_requests, 1),
+                        ("per-user tokens", user_tokens, estimated_tokens),
+                    ]
+
+                scope, wait = max(
+                    ((name, bucket.wait_time(amount, now)) for name, bucket, amount in checks),
+                    key=lambda item: item[1]
+                )
+
+                if wait == 0:
+                    for _, bucket, amount in checks:
+                        bucket.take(amount)
+                    self.admitted += 1
+                    if waited:
+                        self.waited += 1
+                    return Reservation(self, user_id, estimated_tokens)
+
+                if now + wait > deadline:
+                    self.rejected += 1
+                    raise QuotaExceeded(wait, scope)
+
+            waited = True
+            time.sleep(wait)
+
+    def _adjust(self, user_id, delta_tokens):
+        if not self.enabled or not delta_tokens:
+            return
+        with self._lock:
+            # Refill first so a refund is capped against the current level
+            now = time.monotonic()
+            self._tokens._refill(now)
+            self._tokens.take(delta_tokens)
+            buckets = self._users.get(user_id)
+            if buckets:
+                buckets[1]._refill(now)
+                buckets[1].take(delta_tokens)
+
+    def stats(self):
+        with self._lock:
+            now = time.monotonic()
+            self._requests._refill(now)
+            self._tokens._refill(now)
+            return {
+                "enabled": self.enabled,
+                "rpm": self.rpm,
+                "tpm": self.tpm,
+                "user_share": self.user_share,
+                "requests_available": round(self._requests.level, 2),
+                "tokens_available": round(self._tokens.level),
+                "tracked_users": len(self._users),
+                "admitted": self.admitted,
+                "waited": self.waited,
+                "rejected": self.rejected,
+            }
+
+
+def estimate_tokens(messages) -> int:
+    """Rough prompt size (~4 characters per token) plus expected output."""
+    if isinstance(messages, str):
+        messages = [messages]
+
+    chars = 0
+    images = 0
+    for message in messages:
+        content = getattr(message, "content", message)
+        if isinstance(content, str):
+            chars += len(content)
+            continue
+        for part in content or []:
+            if isinstance(part, dict) and part.get("type") == "image_url":
+                images += 1
+            elif isinstance(part, dict):
+                chars += len(str(part.get("text", "")))
+            else:
+                chars += len(str(part))
+
+    return chars // 4 + images * ESTIMATED_IMAGE_TOKENS + ESTIMATED_OUTPUT_TOKENS
+
+
+def actual_tokens(response):
+    usage = getattr(response, "usage_metadata", None) or {}
+    return usage.get("total_tokens")
+
+
+governor = QuotaGovernor(
+    rpm=GEMINI_RPM,
+    tpm=GEMINI_TPM,
+    user_share=GEMINI_USER_SHARE,
+    max_wait=GEMINI_QUOTA_MAX_WAIT,
+    enabled=GEMINI_QUOTA_ENABLED,
+)
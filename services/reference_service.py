@@ -1,7 +1,11 @@
 import json
 import os
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain_core.messages import HumanMessage
+import threading
+import time
+from functools import lru_cache
+
+from services.llm_client import invoke_llm, LLMInvocationError
+from services.unit_conversion import canonicalize_unit, convert_value
 
 
 TEST_ALIASES = {
@@ -33,8 +37,80 @@ REFERENCE_PATH = os.path.join(
     "reference_range.json"
 )
 
-with open(REFERENCE_PATH, "r") as f:
-    REFERENCE_DATA = json.load(f)
+# How often (seconds) lookups re-check reference_range.json for edits
+REFERENCE_RELOAD_INTERVAL = float(os.getenv("REFERENCE_RELOAD_INTERVAL", "5"))
+
+_index_lock = threading.Lock()
+_index_stamp = None
+_index_checked_at = 0.0
+_REFERENCE_INDEX = {}
+
+
+def _reference_file_stamp():
+    stat = os.stat(REFERENCE_PATH)
+    return stat.st_mtime_ns, stat.st_size
+
+
+def _build_reference_index(reference_data):
+    """
+    Flattens every test_key and alias into one dict. The first test to
+    claim a name wins, same as the old category-by-category scan.
+    """
+    index = {}
+
+    for category in reference_data:
+        for test in category.get("tests", []):
+            test_key = test.get("test_key")
+
+            if not test_key:
+                continue
+
+            index.setdefault(test_key, test)
+            for alias in TEST_ALIASES.get(test_key, []):
+                index.setdefault(alias, test)
+
+    return index
+
+
+def _load_reference_data():
+    global REFERENCE_DATA, _REFERENCE_INDEX, _index_stamp
+
+    stamp = _reference_file_stamp()
+    with open(REFERENCE_PATH, "r") as f:
+        data = json.load(f)
+
+    REFERENCE_DATA = data
+    _REFERENCE_INDEX = _build_reference_index(data)
+    _index_stamp = stamp
+
+
+def _reference_index():
+    """
+    The reference index, loaded on first use rather than at import and
+    re-checked for edits at most every REFERENCE_RELOAD_INTERVAL.
+    """
+    global _index_checked_at
+
+    now = time.monotonic()
+    if _index_stamp is not None and now - _index_checked_at < REFERENCE_RELOAD_INTERVAL:
+        return _REFERENCE_INDEX
+
+    with _index_lock:
+        if _index_stamp is None:
+            _load_reference_data()
+            _index_checked_at = now
+
+        elif now - _index_checked_at >= REFERENCE_RELOAD_INTERVAL:
+            try:
+                if _reference_file_stamp() != _index_stamp:
+                    _load_reference_data()
+            except (OSError, json.JSONDecodeError) as e:
+                # Keep serving the last good index while the file is mid-edit
+                print(f"Reference reload failed: {e}")
+            _index_checked_at = now
+
+    return _REFERENCE_INDEX
+
 
 def normalize_gender(gender: str | None) -> str | None:
     if not gender:
@@ -49,7 +125,8 @@ def normalize_gender(gender: str | None) -> str | None:
     return None
 
 
-def _normalize_test_name(name: str) -> str:
+@lru_cache(maxsize=2048)
+def normalize_test_name(name: str) -> str:
     return (
         name.lower()
         .replace("(", "")
@@ -64,42 +141,49 @@ def _normalize_test_name(name: str) -> str:
 
 
 def find_test_reference(test_name_snake: str):
-    normalized_input = _normalize_test_name(test_name_snake)
+    normalized_input = normalize_test_name(test_name_snake)
+    return _reference_index().get(normalized_input)
 
-    for category in REFERENCE_DATA:
-        for test in category.get("tests", []):
-            test_key = test.get("test_key")
 
-            if not test_key:
-                continue
 
-            if normalized_input == test_key:
-                return test
 
-            aliases = TEST_ALIASES.get(test_key, [])
-            if normalized_input in aliases:
-                return test
+def normalize_value_with_gemini(
+    test_name: str,
+    value: float,
+    current_unit: str,
+    target_unit: str,
+    test_key: str | None = None
+):
+    """
+    Converts value into target_unit. Uses the offline conversion table
+    first and only asks Gemini for pairs the table does not cover.
+    """
+    if canonicalize_unit(current_unit) == canonicalize_unit(target_unit):
+        return value, target_unit
 
-    return None
+    try:
+        converted = convert_value(
+            test_key or test_name,
+            float(value),
+            current_unit,
+            target_unit
+        )
+    except (TypeError, ValueError):
+        converted = None
 
+    if converted is not None:
+        return converted, target_unit
 
+    return _convert_with_gemini(test_name, value, current_unit, target_unit)
 
 
-def normalize_value_with_gemini(
+@lru_cache(maxsize=1024)
+def _convert_with_gemini(
     test_name: str,
     value: float,
     current_unit: str,
     target_unit: str
 ):
-    if current_unit == target_unit:
-        return value, target_unit
-
-    llm = ChatGoogleGenerativeAI(
-        model="gemini-2.5-flash",
-        temperature=0,
-        google_api_key=os.getenv("GEMINI_API_KEY")
-    )
-
     prompt = f"""
 You are a medical unit conversion engine.
 
@@ -123,11 +207,16 @@ Output:
 }}
 """
 
-    response = llm.invoke([HumanMessage(content=prompt)])
+    from langchain_core.messages import HumanMessage
+
+    response = invoke_llm([HumanMessage(content=prompt)], temperature=0)
     content = response.content.strip().replace("```json", "").replace("```", "")
 
-    data = json.loads(content)
-    return data["normalized_value"], data["normalized_unit"]
+    try:
+        data = json.loads(content)
+        return data["normalized_value"], data["normalized_unit"]
+    except (json.JSONDecodeError, KeyError, TypeError) as e:
+        raise LLMInvocationError("INVALID_AI_RESPONSE") from e
 
 
 
@@ -170,7 +259,8 @@ def prepare_test_for_analysis(
         test_name_snake,
         extracted_value,
         extracted_unit,
-        standard_unit
+        standard_unit,
+        test_key=ref["test_key"]
     )
 
     ref_range = get_gender_reference_range(ref, gender)
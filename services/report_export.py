@@ -0,0 +1,195 @@
+import os
+import tempfile
+import threading
+import time
+import zipfile
+from collections import deque
+
+from database.db_service import DBService, HISTORY_MAX_PAGE_SIZE
+from services.pdf_render_queue import pdf_render_queue, PDF_RENDER_TIMEOUT
+
+
+EXPORT_MAX_REPORTS = int(os.getenv("EXPORT_MAX_REPORTS", "100"))
+# A merged PDF is laid out in one pass before anything is sent, so it is
+# held to far fewer reports than a ZIP (which streams as renders finish)
+EXPORT_MAX_MERGED_REPORTS = int(os.getenv("EXPORT_MAX_MERGED_REPORTS", "20"))
+EXPORT_CHUNK_SIZE = 64 * 1024
+# Merged PDFs above this size spill from memory to a temp file
+EXPORT_SPOOL_MAX = int(os.getenv("EXPORT_SPOOL_MAX_BYTES", str(8 * 1024 * 1024)))
+
+EXPORT_FORMATS = ("zip", "pdf")
+
+
+class ExportStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.exports = {fmt: 0 for fmt in EXPORT_FORMATS}
+        self.reports = 0
+        self.failed_reports = 0
+        self.bytes_sent = 0
+        self.total_time = 0.0
+
+    def record(self, fmt, reports, failed, sent, elapsed):
+        with self._lock:
+            self.exports[fmt] += 1
+            self.reports += reports
+            self.failed_reports += failed
+            self.bytes_sent += sent
+            self.total_time += elapsed
+
+    def stats(self):
+        with self._lock:
+            count = sum(self.exports.values())
+            return {
+                "exports": dict(self.exports),
+                "reports": self.reports,
+                "failed_reports": self.failed_reports,
+                "bytes_sent": self.bytes_sent,
+                "avg_export_ms": round(self.total_time / count * 1000, 1) if count else 0.0,
+            }
+
+
+export_stats = ExportStats()
+
+
+def collect_reports(user_id, report_ids=None):
+    """
+    The user's analyzed reports to export, newest first: the given ids
+    (others' reports are dropped) or all of them, up to EXPORT_MAX_REPORTS.
+    """
+    if report_ids is None:
+        report_ids = []
+        cursor = None
+        while len(report_ids) < EXPORT_MAX_REPORTS:
+            page = DBService.get_user_history(
+                user_id,
+                page_size=HISTORY_MAX_PAGE_SIZE,
+                before=cursor
+            )
+            report_ids += [r["id"] for r in page["items"] if r.get("status") == "analyzed"]
+            cursor = page["next_cursor"]
+            if not cursor:
+                break
+
+    reports = []
+    for report_id in report_ids[:EXPORT_MAX_REPORTS]:
+        report = DBService.get_report_by_id(report_id)
+        if not report or report.get("status") != "analyzed":
+            continue
+        if report.get("user_id") != user_id:
+            continue
+        reports.append(report)
+
+    return reports
+
+
+def _rendered(reports):
+    """
+    Yields (report, pdf_bytes or None) in order. Renders go through the
+    shared render queue, so they run in parallel, reuse cached PDFs and
+    join renders already in flight; only a small window is queued ahead
+    so a large export does not hold every PDF in memory.
+    """
+    window = pdf_render_queue.workers * 2
+    pending = deque()
+
+    def next_result():
+        report, future = pending.popleft()
+        try:
+            return report, future.result(timeout=PDF_RENDER_TIMEOUT)
+        except Exception as e:
+            print(f"EXPORT RENDER ERROR ({report.get('id')}):", e)
+            return report, None
+
+    for report in reports:
+        pending.append((report, pdf_render_queue.submit(report)))
+        if len(pending) >= window:
+            yield next_result()
+
+    while pending:
+        yield next_result()
+
+
+def _file_name(report):
+    date = (report.get("created_at") or "")[:10] or "undated"
+    return f"report_{date}_{report['id']}.pdf"
+
+
+class _ChunkSink:
+    """
+    Write-only target for ZipFile. It has no tell(), so ZipFile writes
+    sizes into data descriptors instead of seeking back, and whatever
+    has been written so far can be drained and sent.
+    """
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def stream_zip(reports):
+    """ZIP of one PDF per report, sent entry by entry as renders finish."""
+    start = time.perf_counter()
+    sink = _ChunkSink()
+    sent = 0
+    failed = []
+
+    with zipfile.ZipFile(sink, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        for report, pdf_bytes in _rendered(reports):
+            if pdf_bytes is None:
+                failed.append(str(report["id"]))
+                continue
+
+            archive.writestr(_file_name(report), pdf_bytes)
+            chunk = sink.drain()
+            sent += len(chunk)
+            yield chunk
+
+        if failed:
+            archive.writestr(
+                "errors.txt",
+                "These reports could not be rendered:\n" + "\n".join(failed) + "\n"
+            )
+
+    chunk = sink.drain()
+    sent += len(chunk)
+    yield chunk
+
+    export_stats.record("zip", len(reports), len(failed), sent, time.perf_counter() - start)
+
+
+def stream_merged_pdf(reports):
+    """
+    One PDF with a table of contents. It is laid out as a single document
+    (so it cannot reuse the per-report cache) and spooled to a temp file
+    once large, then sent in chunks. Nothing is sent until the layout is
+    done, hence EXPORT_MAX_MERGED_REPORTS.
+    """
+    from services.pdf_services import generate_merged_pdf
+
+    start = time.perf_counter()
+    sent = 0
+
+    with tempfile.SpooledTemporaryFile(max_size=EXPORT_SPOOL_MAX) as spool:
+        generate_merged_pdf(reports, spool)
+        spool.seek(0)
+
+        while True:
+            chunk = spool.read(EXPORT_CHUNK_SIZE)
+            if not chunk:
+                break
+            sent += len(chunk)
+            yield chunk
+
+    export_stats.record("pdf", len(reports), 0, sent, time.perf_counter() - start)
@@ -0,0 +1,185 @@
+import hashlib
+import os
+import threading
+import time
+
+import jwt
+
+from config.supabase_config import get_supabase
+from utils.cache import LocalCache
+
+
+SUPABASE_URL = os.getenv("SUPABASE_URL")
+SUPABASE_JWT_SECRET = os.getenv("SUPABASE_JWT_SECRET")
+SUPABASE_JWT_AUDIENCE = os.getenv("SUPABASE_JWT_AUDIENCE", "authenticated")
+# Supabase Auth signs tokens with iss = <project url>/auth/v1
+SUPABASE_JWT_ISSUER = os.getenv(
+    "SUPABASE_JWT_ISSUER",
+    f"{SUPABASE_URL.rstrip('/')}/auth/v1" if SUPABASE_URL else None
+)
+JWKS_CACHE_SECONDS = int(os.getenv("JWKS_CACHE_SECONDS", "600"))
+# Minimum gap between JWKS re-downloads triggered by an unknown kid
+JWKS_REFRESH_INTERVAL = float(os.getenv("JWKS_REFRESH_INTERVAL", "60"))
+
+# Upper bound only; each entry is also checked against its own exp claim
+_claims_cache = LocalCache(maxsize=4096, ttl=3600)
+
+_jwks_client = None
+_jwks_lock = threading.Lock()
+_jwks_refresh_lock = threading.Lock()
+_jwks_refreshed_at = 0.0
+
+_stats_lock = threading.Lock()
+_stats = {"cache_hits": 0, "local": 0, "remote": 0, "rejected": 0}
+
+
+class InvalidToken(Exception):
+    pass
+
+
+class _LocalVerificationUnavailable(Exception):
+    pass
+
+
+def _count(name):
+    with _stats_lock:
+        _stats[name] += 1
+
+
+def _jwks():
+    global _jwks_client
+
+    if not SUPABASE_URL:
+        raise _LocalVerificationUnavailable("SUPABASE_URL not set")
+
+    if _jwks_client is None:
+        with _jwks_lock:
+            if _jwks_client is None:
+                _jwks_client = jwt.PyJWKClient(
+                    f"{SUPABASE_URL.rstrip('/')}/auth/v1/.well-known/jwks.json",
+                    cache_keys=True,
+                    lifespan=JWKS_CACHE_SECONDS
+                )
+    return _jwks_client
+
+
+def _signing_key(token):
+    """
+    PyJWKClient.get_signing_key_from_jwt, except that an unknown kid
+    re-downloads the JWKS at most once per JWKS_REFRESH_INTERVAL, so
+    tokens with forged kids do not each cost a request to Supabase.
+    """
+    global _jwks_refreshed_at
+
+    client = _jwks()
+    kid = jwt.get_unverified_header(token).get("kid")
+
+    key = client.match_kid(client.get_signing_keys(), kid)
+    if key is None:
+        with _jwks_refresh_lock:
+            now = time.monotonic()
+            if now - _jwks_refreshed_at >= JWKS_REFRESH_INTERVAL:
+                _jwks_refreshed_at = now
+                key = client.match_kid(client.get_signing_keys(refresh=True), kid)
+
+    if key is None:
+        raise jwt.PyJWKClientError(f'Unable to find a signing key that matches: "{kid}"')
+    return key
+
+
+def _decode_locally(token):
+    """
+    Verifies signature, expiry, audience and issuer without calling Supabase:
+    HS256 tokens with SUPABASE_JWT_SECRET, asymmetric ones with the
+    project's cached JWKS.
+    """
+    alg = jwt.get_unverified_header(token).get("alg")
+
+    if alg == "HS256":
+        if not SUPABASE_JWT_SECRET:
+            raise _LocalVerificationUnavailable("SUPABASE_JWT_SECRET not set")
+        key = SUPABASE_JWT_SECRET
+
+    elif alg in ("RS256", "ES256"):
+        try:
+            signing_key = _signing_key(token)
+        except jwt.PyJWKClientConnectionError as e:
+            raise _LocalVerificationUnavailable(str(e))
+        except jwt.PyJWKClientError as e:
+            # Unknown kid or unusable JWKS: reject like any other bad token
+            raise jwt.InvalidTokenError(str(e))
+
+        # The header's alg must match the key it names; PyJWT fails with a
+        # TypeError rather than a PyJWTError when they disagree
+        if signing_key.algorithm_name != alg:
+            raise jwt.InvalidAlgorithmError(
+                f"Token alg {alg} does not match key alg {signing_key.algorithm_name}"
+            )
+        key = signing_key.key
+
+    else:
+        raise _LocalVerificationUnavailable(f"Unsupported alg {alg}")
+
+    return jwt.decode(
+        token,
+        key,
+        algorithms=[alg],
+        audience=SUPABASE_JWT_AUDIENCE,
+        issuer=SUPABASE_JWT_ISSUER,
+        options={"require": ["exp", "sub"]}
+    )
+
+
+def _verify_remotely(token):
+    res = get_supabase().auth.get_user(token)
+    if not res or not res.user:
+        raise InvalidToken("Invalid or expired token")
+
+    unverified = jwt.decode(token, options={"verify_signature": False})
+    return {
+        "sub": res.user.id,
+        "email": res.user.email,
+        "exp": unverified.get("exp", time.time() + 60),
+    }
+
+
+def verify_access_token(token: str) -> dict:
+    """
+    Returns the token's claims ("sub", "email", "exp", ...) or raises
+    InvalidToken. Verified claims are cached until the token expires.
+    Supabase is asked only when the token cannot be checked locally.
+    """
+    cache_key = hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+    claims = _claims_cache.get(cache_key)
+    if claims is not None and claims.get("exp", 0) > time.time():
+        _count("cache_hits")
+        return claims
+
+    try:
+        claims = _decode_locally(token)
+        _count("local")
+
+    except _LocalVerificationUnavailable:
+        try:
+            claims = _verify_remotely(token)
+        except InvalidToken:
+            _count("rejected")
+            raise
+        except Exception as e:
+            _count("rejected")
+            raise InvalidToken(str(e))
+        _count("remote")
+
+    except jwt.PyJWTError as e:
+        # Includes InvalidKeyError, e.g. an alg that does not fit the JWKS key
+        _count("rejected")
+        raise InvalidToken(str(e))
+
+    _claims_cache.set(cache_key, claims)
+    return claims
+
+
+def get_verifier_stats():
+    with _stats_lock:
+        return dict(_stats)
@@ -0,0 +1,128 @@
+import re
+from functools import lru_cache
+
+
+# Conversions are linear: target = value * factor + offset.
+# Entries are keyed by (test_key, from_unit, to_unit) on canonical unit
+# strings; ANY_TEST means the conversion holds for every analyte.
+ANY_TEST = "*"
+
+# Spelling variants labs use for the same unit, mapped onto one form
+_UNIT_SYNONYMS = {
+    "iu/l": "u/l",
+    "units/l": "u/l",
+    "mg%": "mg/dl",
+    "g%": "g/dl",
+    "gm/dl": "g/dl",
+    "gms/dl": "g/dl",
+    "gm/l": "g/l",
+    "micromol/l": "umol/l",
+    "ml/min/1.73m^2": "ml/min/1.73m2",
+    "cu.mic": "fl",
+    "x10^12/l": "10^12/l",
+    "10^6/ul": "10^12/l",
+    "x10^6/ul": "10^12/l",
+    "million/ul": "10^12/l",
+    "mill/ul": "10^12/l",
+    "millions/ul": "10^12/l",
+    "x10^9/l": "10^9/l",
+    "10^3/ul": "10^9/l",
+    "x10^3/ul": "10^9/l",
+    "thou/ul": "10^9/l",
+    "k/ul": "10^9/l",
+    "/ul": "cells/ul",
+    "lakhs/ul": "lakh/ul",
+}
+
+
+@lru_cache(maxsize=512)
+def canonicalize_unit(unit: str | None) -> str | None:
+    """
+    Reduces a unit string to a canonical spelling so "mg/dL", "mg/dl"
+    and "mg / dL" compare equal.
+    """
+    if not unit or not isinstance(unit, str):
+        return None
+
+    u = unit.strip().lower()
+    u = u.replace("μ", "u").replace("µ", "u").replace("mcmol", "umol")
+    u = u.replace("³", "^3").replace("⁶", "^6").replace("⁹", "^9").replace("¹²", "^12")
+    u = u.replace("×", "x").replace("*", "x")
+    u = u.replace(" ", "")
+    u = re.sub(r"cu\.?mm|mm\^?3", "ul", u)
+    u = re.sub(r"10e(\d+)", r"10^\1", u)
+
+    return _UNIT_SYNONYMS.get(u, u)
+
+
+class ConversionRegistry:
+    def __init__(self):
+        self._table = {}
+
+    def register(self, test_key, from_unit, to_unit, factor, offset=0.0, inverse=True):
+        src = canonicalize_unit(from_unit)
+        dst = canonicalize_unit(to_unit)
+
+        self._table[(test_key, src, dst)] = (factor, offset)
+
+        if inverse:
+            self._table[(test_key, dst, src)] = (1 / factor, -offset / factor)
+
+    def lookup(self, test_key, from_unit, to_unit):
+        src = canonicalize_unit(from_unit)
+        dst = canonicalize_unit(to_unit)
+
+        return (
+            self._table.get((test_key, src, dst))
+            or self._table.get((ANY_TEST, src, dst))
+        )
+
+    def convert(self, test_key, value, from_unit, to_unit):
+        """
+        Returns the converted value, or None when no local conversion
+        is known for this pair.
+        """
+        if canonicalize_unit(from_unit) == canonicalize_unit(to_unit):
+            return value
+
+        entry = self.lookup(test_key, from_unit, to_unit)
+        if entry is None:
+            return None
+
+        factor, offset = entry
+        return round(value * factor + offset, 4)
+
+
+registry = ConversionRegistry()
+
+# Unit-only conversions that hold for every analyte
+registry.register(ANY_TEST, "g/L", "g/dL", 0.1)
+registry.register(ANY_TEST, "mg/L", "mg/dL", 0.1)
+registry.register(ANY_TEST, "ukat/L", "U/L", 60.0)
+registry.register(ANY_TEST, "L/L", "%", 100.0)
+registry.register(ANY_TEST, "cells/uL", "x10^9/L", 0.001)
+registry.register(ANY_TEST, "lakh/uL", "x10^9/L", 100.0)
+
+# Analyte-specific molar <-> mass conversions
+registry.register("glucose_fasting", "mmol/L", "mg/dL", 18.016)
+registry.register("cholesterol_total", "mmol/L", "mg/dL", 38.67)
+registry.register("hdl", "mmol/L", "mg/dL", 38.67)
+registry.register("ldl", "mmol/L", "mg/dL", 38.67)
+registry.register("triglycerides", "mmol/L", "mg/dL", 88.57)
+registry.register("creatinine", "umol/L", "mg/dL", 1 / 88.42)
+registry.register("bun", "mmol/L", "mg/dL", 2.801)
+registry.register("calcium", "mmol/L", "mg/dL", 4.008)
+registry.register("bilirubin_total", "umol/L", "mg/dL", 1 / 17.1)
+registry.register("hemoglobin", "mmol/L", "g/dL", 1.611)
+registry.register("hba1c", "mmol/mol", "%", 0.09148, offset=2.152)
+
+# mEq/L is mmol/L times the ion's charge, so it is only a synonym for
+# monovalent ions; divalent calcium needs half the molar value
+registry.register("sodium", "mEq/L", "mmol/L", 1.0)
+registry.register("potassium", "mEq/L", "mmol/L", 1.0)
+registry.register("calcium", "mEq/L", "mmol/L", 0.5)
+registry.register("calcium", "mEq/L", "mg/dL", 0.5 * 4.008)
+
+
+def convert_value(test_key, value, from_unit, to_unit):
+    return registry.convert(test_key, value, from_unit, to_unit)
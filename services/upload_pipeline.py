@@ -0,0 +1,106 @@
+import uuid
+
+from database.db_service import DBService
+from database.storage import upload_file, get_public_url, delete_file
+from services.gemini_vision import extract_data_from_image
+from services.job_queue import JobFailed
+from services.quota_governor import user_scope
+from utils.concurrency import io_executor
+
+
+REPORTS_BUCKET = "reports"
+
+
+def _store_file(file_path, file_bytes, content_type):
+    upload_file(REPORTS_BUCKET, file_path, file_bytes, content_type)
+    return get_public_url(REPORTS_BUCKET, file_path)
+
+
+def _extract(file_bytes, content_type):
+    print("AI STEP: starting extraction")
+    extraction_result = extract_data_from_image(file_bytes, content_type)
+    print("AI STEP: extraction returned")
+
+    if not extraction_result.get("success"):
+        error_code = extraction_result.get("error") or "AI_FAILED"
+
+        if error_code == "QUOTA_EXHAUSTED":
+            raise JobFailed(
+                "QUOTA_EXHAUSTED",
+                "AI quota exhausted. Please try later.",
+                retry_after=extraction_result.get("retry_after")
+            )
+
+        raise JobFailed(
+            "AI_FAILED",
+            extraction_result.get("message") or "AI processing failed.",
+            retry_after=extraction_result.get("retry_after")
+        )
+
+    return extraction_result["data"]
+
+
+def stage_upload(user_id, file_bytes, filename, content_type):
+    """
+    Stores the uploaded file and extracts its data with Gemini Vision,
+    without creating the report row. Raises JobFailed for AI failures.
+
+    Storage and extraction only depend on file_bytes, so the upload runs
+    on the shared I/O pool while extraction runs here. If extraction
+    fails, the stored file is removed again.
+    """
+    file_ext = filename.rsplit(".", 1)[-1]
+    file_path = f"{user_id}/{uuid.uuid4()}.{file_ext}"
+
+    storage_future = io_executor.submit(
+        _store_file, file_path, file_bytes, content_type
+    )
+
+    try:
+        with user_scope(user_id):
+            extracted_data = _extract(file_bytes, content_type)
+        file_url = storage_future.result()
+    except Exception:
+        discard_staged(storage_future, file_path)
+        raise
+
+    return {
+        "file_path": file_path,
+        "file_url": file_url,
+        "raw_data": extracted_data,
+    }
+
+
+def discard_staged(storage_future, file_path):
+    # Wait for the upload so the delete cannot race ahead of it
+    if storage_future is not None:
+        try:
+            storage_future.result()
+        except Exception:
+            pass
+    delete_file(REPORTS_BUCKET, file_path)
+
+
+def process_upload(user_id, file_bytes, filename, content_type):
+    """
+    Stores the uploaded file, extracts its data and creates the pending
+    report row. Raises JobFailed for AI failures; the stored file is
+    removed if any step fails.
+    """
+    staged = stage_upload(user_id, file_bytes, filename, content_type)
+
+    try:
+        report = DBService.create_report(
+            user_id=user_id,
+            file_url=staged["file_url"],
+            raw_data=staged["raw_data"],
+        )
+
+        if not report or "id" not in report:
+            raise Exception("Report insert failed")
+
+    except Exception:
+        discard_staged(None, staged["file_path"])
+        raise
+
+    return {"report_id": report["id"]}
@@ -0,0 +1,48 @@
+import threading
+from cachetools import LRUCache, TTLCache
+
+
+class LocalCache:
+    """
+    Thread-safe in-process LRU cache (TTL optional) with hit/miss counters.
+    cachetools caches are not safe to share between threads on their own.
+    """
+
+    def __init__(self, maxsize: int, ttl: float | None = None):
+        self._cache = TTLCache(maxsize, ttl) if ttl else LRUCache(maxsize)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            try:
+                value = self._cache[key]
+            except KeyError:
+                self.misses += 1
+                return default
+            self.hits += 1
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._cache[key] = value
+
+    def delete(self, key):
+        with self._lock:
+            self._cache.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._cache),
+                "maxsize": self._cache.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 3) if lookups else 0.0,
+            }
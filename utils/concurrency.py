@@ -0,0 +1,24 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+
+IO_WORKERS = int(os.getenv("IO_WORKERS", "16"))
+
+# Shared pool for overlapping independent network calls (storage, DB, AI)
+io_executor = ThreadPoolExecutor(
+    max_workers=IO_WORKERS,
+    thread_name_prefix="io"
+)
+
+
+def log_failures(future, label):
+    """
+    Logs the exception of a fire-and-forget future once it finishes.
+    Returns the future so callers can still wait on it.
+    """
+    def _log(done):
+        if not done.cancelled() and done.exception():
+            print(f"{label} ERROR:", done.exception())
+
+    future.add_done_callback(_log)
+    return future
@@ -1,3 +1,5 @@
+import os
+
 # Fixed values to keep things consistent
 ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'webp'}
 MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB max upload
@@ -9,6 +11,21 @@ FORBIDDEN_KEYWORDS = [
     "consult immediately", "emergency"
 ]
 
+# PDF chart: "reportlab" draws vector charts; "matplotlib" embeds a PNG
+PDF_CHART_BACKENDS = ("reportlab", "matplotlib")
+PDF_CHART_BACKEND = os.getenv("PDF_CHART_BACKEND", "reportlab").lower()
+
+# Checked at import so a typo stops the app at startup, not at the first download
+if PDF_CHART_BACKEND not in PDF_CHART_BACKENDS:
+    raise ValueError(
+        f"Unknown PDF_CHART_BACKEND {PDF_CHART_BACKEND!r}; "
+        f"expected one of {', '.join(PDF_CHART_BACKENDS)}"
+    )
+
+# Bump whenever the PDF layout changes so cached renders are not reused.
+# Kept here so the download path can build cache keys without importing ReportLab.
+PDF_TEMPLATE_VERSION = f"4-{PDF_CHART_BACKEND}"
+
 # Standard reference ranges (fallback) [cite: 95]
 DEFAULT_REFERENCE_RANGES = {
     "hemoglobin": {"min": 13.0, "max": 17.0, "unit": "g/dL"},